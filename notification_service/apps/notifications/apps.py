@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class NotificationsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.notifications"
+
+    def ready(self):
+        # Сигналы инвалидации таблицы маршрутизации каналов
+        from apps.notifications import routing  # noqa: F401
+
+        if settings.PERF_PROFILING:
+            from apps.notifications.profiling import connect_task_signals
+
+            connect_task_signals()
@@ -0,0 +1,138 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from celery.signals import worker_process_shutdown
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from apps.notifications.models import DeliveryAttempt
+from apps.notifications.stats import TRANSITIONS, StatsRollup
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class DeliveryAttemptRecorder:
+    """Копит попытки доставки и переходы outbox в памяти и пишет их в БД пачками.
+
+    Вызывающий поток только кладет событие в очередь; фоновый поток делает
+    bulk_create попыток и обновляет DeliveryStatsBucket, когда набралось
+    DELIVERY_ATTEMPT_BATCH_SIZE событий или прошло
+    DELIVERY_ATTEMPT_FLUSH_INTERVAL_MS с первого события пачки. Остаток
+    дописывается при остановке процесса.
+    """
+
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+        atexit.register(self.stop)
+        # Дочерние процессы prefork-пула завершаются через os._exit, минуя atexit
+        worker_process_shutdown.connect(self._on_worker_shutdown, weak=False)
+        # Дочерние процессы prefork-пула наследуют очередь, но не поток
+        os.register_at_fork(after_in_child=self._reset)
+
+    def record(self, **fields):
+        self._put(DeliveryAttempt(**fields))
+
+    def record_transition(self, method, transition):
+        """transition — счетчик DeliveryStatsBucket: sent, retried, failed, ..."""
+        if transition not in TRANSITIONS:
+            raise ValueError(f"Неизвестный переход: {transition}")
+        self._put((method, transition, timezone.now()))
+
+    def _put(self, item):
+        self.queue.put(item)
+        if self._thread is None:
+            self._start()
+
+    def stop(self):
+        thread = self._thread
+        if thread is not None:
+            self.queue.put(_STOP)
+            thread.join(timeout=10)
+
+    def _on_worker_shutdown(self, **kwargs):
+        self.stop()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="delivery-attempts", daemon=True
+                )
+                self._thread.start()
+
+    def _reset(self):
+        self.queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _run(self):
+        try:
+            stopped = False
+            while not stopped:
+                batch, stopped = self._collect()
+                if batch:
+                    self._write(batch)
+        finally:
+            connection.close()
+            self._thread = None
+
+    def _collect(self):
+        """Ждет первую запись, затем добирает пачку до batch_size или до дедлайна"""
+        item = self.queue.get()
+        if item is _STOP:
+            return [], True
+
+        batch = [item]
+        deadline = time.monotonic() + settings.DELIVERY_ATTEMPT_FLUSH_INTERVAL_MS / 1000
+        while len(batch) < settings.DELIVERY_ATTEMPT_BATCH_SIZE:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+
+        return batch, False
+
+    def _write(self, batch):
+        attempts = [item for item in batch if isinstance(item, DeliveryAttempt)]
+        rollup = StatsRollup()
+        for item in batch:
+            if isinstance(item, DeliveryAttempt):
+                rollup.add_attempt(item)
+            else:
+                rollup.add_transition(*item)
+
+        # Журнал попыток и статистика не должны ронять доставку
+        try:
+            rollup.apply()
+        except Exception:
+            logger.exception(
+                "Ошибка обновления статистики доставки",
+                extra={"event": "delivery_stats_error", "count": len(batch)},
+            )
+            connection.close()
+        try:
+            DeliveryAttempt.objects.bulk_create(attempts)
+        except Exception:
+            logger.exception(
+                "Ошибка записи попыток доставки",
+                extra={"event": "delivery_attempts_error", "count": len(attempts)},
+            )
+            connection.close()
+
+
+recorder = DeliveryAttemptRecorder()
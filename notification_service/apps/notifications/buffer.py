@@ -0,0 +1,145 @@
+import json
+import os
+import threading
+
+import redis
+from django.conf import settings
+from django.db import connection
+
+from apps.notifications.models import Notification
+
+_client = None
+
+
+def get_redis():
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.REDIS_URL)
+    return _client
+
+
+class IdAllocator:
+    """Выдает id уведомлений блоками из последовательности Postgres.
+
+    Id известен до записи в БД, поэтому API может ответить сразу, а flusher
+    использует его как ключ идемпотентности.
+    """
+
+    def __init__(self, block_size=None):
+        self.block_size = block_size or settings.INGEST_ID_BLOCK_SIZE
+        self._ids = []
+        self._lock = threading.Lock()
+        # Дочерний процесс не должен выдавать те же id, что и родитель
+        os.register_at_fork(after_in_child=self._reset)
+
+    def next(self):
+        with self._lock:
+            if not self._ids:
+                self._ids = self._fetch_block()
+            return self._ids.pop()
+
+    def _reset(self):
+        # Новый список, а не clear(): next() подменяет self._ids целиком
+        self._ids = []
+        self._lock = threading.Lock()
+
+    def _fetch_block(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id')) "
+                "FROM generate_series(1, %s)",
+                [Notification._meta.db_table, self.block_size],
+            )
+            return [row[0] for row in cursor.fetchall()][::-1]
+
+
+_allocator = None
+
+
+def allocate_notification_id():
+    global _allocator
+    if _allocator is None:
+        _allocator = IdAllocator()
+    return _allocator.next()
+
+
+class IngestBuffer:
+    """Redis stream принятых, но еще не записанных в Postgres уведомлений"""
+
+    def __init__(self, client=None):
+        self.client = client or get_redis()
+        self.stream = settings.INGEST_STREAM
+        self.group = settings.INGEST_STREAM_GROUP
+
+    def append(self, entry):
+        self.client.xadd(self.stream, {"data": json.dumps(entry, ensure_ascii=False)})
+
+    def ensure_group(self):
+        try:
+            self.client.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def read(self, consumer, count, block_ms):
+        """Сначала забирает записи, зависшие у упавших flusher-ов, затем новые"""
+        claimed = self.client.xautoclaim(
+            self.stream,
+            self.group,
+            consumer,
+            min_idle_time=settings.INGEST_CLAIM_IDLE_MS,
+            start_id="0-0",
+            count=count,
+        )[1]
+        if claimed:
+            return self._decode(claimed)
+
+        response = self.client.xreadgroup(
+            self.group, consumer, {self.stream: ">"}, count=count, block=block_ms
+        )
+        return self._decode(response[0][1]) if response else []
+
+    def ack(self, stream_ids):
+        pipeline = self.client.pipeline()
+        pipeline.xack(self.stream, self.group, *stream_ids)
+        pipeline.xdel(self.stream, *stream_ids)
+        pipeline.execute()
+
+    def deliveries(self, stream_id):
+        """Сколько раз запись выдавалась flusher-ам (XPENDING)"""
+        pending = self.client.xpending_range(
+            self.stream, self.group, min=stream_id, max=stream_id, count=1
+        )
+        return pending[0]["times_delivered"] if pending else 0
+
+    def dead_letter(self, stream_id, entry, error):
+        """Откладывает запись, которую не удается записать, в INGEST_DEAD_STREAM"""
+        self.client.xadd(
+            settings.INGEST_DEAD_STREAM,
+            {
+                "data": json.dumps(entry, ensure_ascii=False),
+                "stream_id": stream_id,
+                "error": str(error)[:1000],
+            },
+        )
+
+    def redrive(self, count=None):
+        """Возвращает записи из INGEST_DEAD_STREAM в stream приема.
+
+        Уже записанные уведомления flusher распознает как повторы.
+        """
+        records = self.client.xrange(settings.INGEST_DEAD_STREAM, count=count)
+        if records:
+            pipeline = self.client.pipeline()
+            for dead_id, fields in records:
+                pipeline.xadd(self.stream, {"data": fields[b"data"]})
+                pipeline.xdel(settings.INGEST_DEAD_STREAM, dead_id)
+            pipeline.execute()
+        return len(records)
+
+    def _decode(self, records):
+        return [
+            (stream_id, json.loads(fields[b"data"]))
+            for stream_id, fields in records
+            if fields
+        ]
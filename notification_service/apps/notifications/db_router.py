@@ -0,0 +1,84 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PRIMARY = DEFAULT_DB_ALIAS
+REPLICA = "replica"
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_replica_reads = ContextVar("replica_reads", default=False)
+
+
+@contextmanager
+def replica_reads():
+    """Разрешает чтения с реплики внутри блока (по умолчанию все идет в primary)"""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """Чтения с реплики только там, где их явно разрешили через replica_reads().
+
+    Celery-задачи, команды и claim outbox никогда не включают replica_reads,
+    поэтому всегда работают с primary; внутри транзакции чтения тоже идут
+    в primary, чтобы видеть собственные незакоммиченные записи.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (
+            _replica_reads.get()
+            and REPLICA in settings.DATABASES
+            and not connections[PRIMARY].in_atomic_block
+        ):
+            return REPLICA
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+class ReplicaRoutingMiddleware:
+    """Отправляет безопасные HTTP-запросы на реплику с read-your-writes.
+
+    После успешной записи клиент получает cookie, и следующие
+    REPLICA_STICKY_SECONDS секунд его чтения идут в primary, пока реплика
+    не догонит созданные им данные.
+    """
+
+    def __init__(self, get_response):
+        if REPLICA not in settings.DATABASES:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        cookie = settings.REPLICA_STICKY_COOKIE
+
+        if request.method in SAFE_METHODS:
+            if cookie in request.COOKIES:
+                return self.get_response(request)
+            with replica_reads():
+                return self.get_response(request)
+
+        response = self.get_response(request)
+        if response.status_code < 400:
+            response.set_cookie(
+                cookie,
+                "1",
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
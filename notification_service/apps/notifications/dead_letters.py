@@ -0,0 +1,123 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.notifications.models import DeadLetter, OutboxMessage
+from apps.notifications.services import NotificationService
+
+logger = logging.getLogger(__name__)
+
+
+def select_dead_letters(
+    ids=None,
+    method=None,
+    reason_contains=None,
+    created_after=None,
+    created_before=None,
+    limit=None,
+):
+    """Неповторенные dead letters по фильтрам API и команды replay_dead_letters"""
+    queryset = DeadLetter.objects.filter(
+        replayed_at__isnull=True, notification__is_sent=False
+    )
+    if ids is not None:
+        queryset = queryset.filter(id__in=ids)
+    if method:
+        queryset = queryset.filter(method=method)
+    if reason_contains:
+        queryset = queryset.filter(reason__icontains=reason_contains)
+    if created_after:
+        queryset = queryset.filter(created_at__gte=created_after)
+    if created_before:
+        queryset = queryset.filter(created_at__lte=created_before)
+    if limit:
+        queryset = DeadLetter.objects.filter(
+            id__in=list(queryset.order_by("id").values_list("id", flat=True)[:limit])
+        )
+    return queryset
+
+
+class DeadLetterReplayer:
+    """Повторно ставит dead letters в outbox пачками с ограничением скорости.
+
+    Новые сообщения создаются в статусе SCHEDULED с release_at, разнесенными
+    на 1/rate секунды, поэтому даже повтор десятков тысяч записей попадает
+    в опрос outbox равномерно, через release_scheduled_outbox_messages.
+    """
+
+    def __init__(self, rate=None, batch_size=None):
+        self.rate = min(
+            rate or settings.DEAD_LETTER_REPLAY_RATE,
+            settings.DEAD_LETTER_REPLAY_MAX_RATE,
+        )
+        self.batch_size = batch_size or settings.DEAD_LETTER_REPLAY_BATCH_SIZE
+        self.service = NotificationService()
+
+    def replay(self, queryset, method=None, now=None):
+        """Повторяет неповторенные dead letters из queryset; method — сменить канал"""
+        now = now or timezone.now()
+        dead_letter_ids = list(
+            queryset.filter(replayed_at__isnull=True, notification__is_sent=False)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+
+        replayed = skipped = 0
+        for start in range(0, len(dead_letter_ids), self.batch_size):
+            batch_replayed, batch_skipped = self._replay_batch(
+                dead_letter_ids[start : start + self.batch_size],
+                method,
+                now + timedelta(seconds=replayed / self.rate),
+            )
+            replayed += batch_replayed
+            skipped += batch_skipped
+
+        logger.info(
+            "Dead letters поставлены на повтор",
+            extra={
+                "event": "dead_letters_replayed",
+                "count": replayed,
+                "skipped": skipped,
+                "method": method,
+                "rate": self.rate,
+            },
+        )
+        return {"replayed": replayed, "skipped": skipped}
+
+    def _replay_batch(self, dead_letter_ids, method, release_from):
+        with transaction.atomic():
+            dead_letters = list(
+                DeadLetter.objects.select_for_update(skip_locked=True, of=("self",))
+                .select_related("notification")
+                .filter(id__in=dead_letter_ids, replayed_at__isnull=True)
+                .order_by("id")
+            )
+
+            messages, replayed = [], []
+            for dead_letter in dead_letters:
+                target = method or dead_letter.method
+                message = self.service.build_outbox_message(
+                    dead_letter.notification,
+                    target,
+                    release_at=release_from
+                    + timedelta(seconds=len(messages) / self.rate),
+                )
+                if not message.recipient:
+                    # Для нового канала у получателя нет адреса
+                    continue
+
+                dead_letter.replay_method = target
+                messages.append(message)
+                replayed.append(dead_letter)
+
+            OutboxMessage.objects.bulk_create(messages)
+
+            now = timezone.now()
+            for dead_letter in replayed:
+                dead_letter.replayed_at = now
+            DeadLetter.objects.bulk_update(replayed, ["replayed_at", "replay_method"])
+
+        return len(replayed), len(dead_letter_ids) - len(replayed)
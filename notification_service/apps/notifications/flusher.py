@@ -0,0 +1,263 @@
+import logging
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import (
+    DataError,
+    IntegrityError,
+    InterfaceError,
+    OperationalError,
+    transaction,
+)
+from django.utils.dateparse import parse_datetime
+
+from apps.notifications.buffer import IngestBuffer
+from apps.notifications.models import Notification, OutboxMessage
+from apps.notifications.recipients import UndeliverableNotification
+from apps.notifications.services import NotificationService
+
+logger = logging.getLogger(__name__)
+
+# По этим полям повтор записи отличается от другого уведомления с тем же id
+FINGERPRINT_FIELDS = ("user_id", "title", "message")
+
+# Ошибки самой записи: повтор не поможет, после INGEST_MAX_DELIVERIES — в dead-stream
+DATA_ERRORS = (
+    IntegrityError,
+    DataError,
+    ValueError,
+    KeyError,
+    UndeliverableNotification,
+)
+# Недоступность БД: пачка остается в stream, flush_ingest_buffer делает паузу
+TRANSIENT_ERRORS = (OperationalError, InterfaceError)
+
+
+class IngestFlusher:
+    """Переносит записи из IngestBuffer в Postgres групповыми коммитами.
+
+    Пачка фиксируется одной транзакцией и подтверждается в Redis только после
+    коммита. Если flusher упал между коммитом и XACK, записи будут прочитаны
+    повторно, но уже записанные уведомления распознаются и пропускаются —
+    каждое уведомление и его outbox-сообщение создаются ровно один раз.
+    """
+
+    def __init__(self, consumer, buffer=None):
+        self.consumer = consumer
+        self.buffer = buffer or IngestBuffer()
+        self.service = NotificationService()
+        self.batch_size = settings.INGEST_FLUSH_BATCH_SIZE
+        self.interval = settings.INGEST_FLUSH_INTERVAL_MS / 1000
+
+    def run_once(self):
+        entries = self._collect()
+        if entries:
+            self.flush(entries)
+        return len(entries)
+
+    def flush(self, entries):
+        """Пишет пачку; при TRANSIENT_ERRORS пробрасывает их, оставляя записи в stream"""
+        try:
+            created, replays, collisions = self._write(entries)
+            self._park_collisions(collisions)
+            done = entries
+        except TRANSIENT_ERRORS:
+            raise
+        except Exception:
+            # Одна плохая запись не должна держать всю пачку: пишем по одной
+            logger.exception(
+                "Ошибка записи пачки буфера приема, запись по одной",
+                extra={"event": "ingest_batch_error", "count": len(entries)},
+            )
+            created, replays, done = self._flush_one_by_one(entries)
+
+        if done:
+            self.buffer.ack([stream_id for stream_id, _ in done])
+
+        logger.info(
+            "Буфер приема записан в БД",
+            extra={
+                "event": "ingest_flushed",
+                "count": created,
+                "duplicates": replays,
+                "failed": len(entries) - len(done),
+            },
+        )
+
+    def _flush_one_by_one(self, entries):
+        created = replays = 0
+        done = []
+        for entry in entries:
+            try:
+                entry_created, entry_replays, collisions = self._write([entry])
+                self._park_collisions(collisions)
+            except TRANSIENT_ERRORS:
+                # Записанное до недоступности БД подтверждаем, остальное перечитаем
+                if done:
+                    self.buffer.ack([stream_id for stream_id, _ in done])
+                raise
+            except DATA_ERRORS as e:
+                if self._quarantine(entry, e):
+                    done.append(entry)
+                continue
+            except Exception as e:
+                # Неизвестная ошибка: запись остается в stream и не уходит в dead-stream
+                logger.warning(
+                    "Запись буфера приема не записана",
+                    extra={
+                        "event": "ingest_entry_error",
+                        "stream_id": entry[0],
+                        "error": str(e),
+                    },
+                )
+                continue
+            created += entry_created
+            replays += entry_replays
+            done.append(entry)
+        return created, replays, done
+
+    def _write(self, entries):
+        entries = [(stream_id, self._upgrade(entry)) for stream_id, entry in entries]
+
+        with transaction.atomic():
+            unique, replays, collisions = self._deduplicate(entries)
+            by_id = {entry["id"]: entry for entry in unique}
+
+            quiet_hours = self.service.scheduler.quiet_hours_by_user(
+                entry["user_id"] for entry in unique
+            )
+            notifications = Notification.objects.bulk_create(
+                [
+                    Notification(
+                        id=notification_id,
+                        user_id=entry["user_id"],
+                        title=entry["title"],
+                        message=entry["message"],
+                        channels=entry["channels"],
+                        recipients=entry["recipients"],
+                        send_at=parse_datetime(entry.get("send_at") or ""),
+                        notification_type=entry.get("notification_type", ""),
+                    )
+                    for notification_id, entry in by_id.items()
+                ]
+            )
+            OutboxMessage.objects.bulk_create(
+                [
+                    self.service.build_outbox_message(
+                        notification,
+                        release_at=self._release_at(
+                            by_id[notification.id], notification, quiet_hours
+                        ),
+                    )
+                    for notification in notifications
+                ]
+            )
+
+        return len(notifications), replays, collisions
+
+    def _release_at(self, entry, notification, quiet_hours):
+        if "release_at" in entry:
+            # Записи прошлых версий: release_at посчитан при приеме
+            return parse_datetime(entry["release_at"] or "")
+        return self.service.scheduler.release_at(
+            notification.user_id, notification.send_at, quiet_hours=quiet_hours
+        )
+
+    def _upgrade(self, entry):
+        """Дополняет записи, принятые прошлыми версиями, полями, добавленными позже"""
+        if "channels" not in entry:
+            # До хранения адресов запись содержала только запрошенные methods
+            channels, recipients = self.service.resolve_delivery(
+                entry["user_id"],
+                entry.get("methods"),
+                entry.get("notification_type", ""),
+            )
+            entry = {**entry, "channels": channels, "recipients": recipients}
+        return entry
+
+    def _quarantine(self, entry, error):
+        """После INGEST_MAX_DELIVERIES неудач переносит запись в dead-stream"""
+        stream_id, data = entry
+        deliveries = self.buffer.deliveries(stream_id)
+        log_fields = {
+            "stream_id": stream_id,
+            "notification_id": data.get("id"),
+            "deliveries": deliveries,
+            "error": str(error),
+        }
+
+        if deliveries < settings.INGEST_MAX_DELIVERIES:
+            # Останется неподтвержденной и будет перечитана через XAUTOCLAIM
+            logger.warning(
+                "Запись буфера приема не записана",
+                extra={"event": "ingest_entry_error", **log_fields},
+            )
+            return False
+
+        self.buffer.dead_letter(stream_id, data, error)
+        logger.error(
+            "Запись буфера приема перенесена в dead-stream",
+            extra={"event": "ingest_entry_dead", **log_fields},
+        )
+        return True
+
+    def _deduplicate(self, entries):
+        """Делит записи на новые, повторы уже записанных и коллизии id.
+
+        Повтор — та же запись (перечитанная после падения до XACK) или то же
+        содержимое. Другое уведомление с занятым id — коллизия: новый id ей не
+        выдается, иначе каждое перечитывание создавало бы еще одну строку, а id
+        из ответа клиенту указывал бы на чужое уведомление.
+        """
+        ids = {entry["id"] for _, entry in entries}
+        known = defaultdict(set)
+        for notification_id, *fingerprint in Notification.objects.filter(
+            id__in=ids
+        ).values_list("id", *FINGERPRINT_FIELDS):
+            known[notification_id].add(tuple(fingerprint))
+
+        unique, replays, collisions = [], 0, []
+        for stream_id, entry in entries:
+            fingerprint = tuple(entry[field] for field in FINGERPRINT_FIELDS)
+            if fingerprint in known[entry["id"]]:
+                replays += 1
+            elif known[entry["id"]]:
+                collisions.append((stream_id, entry))
+            else:
+                known[entry["id"]].add(fingerprint)
+                unique.append(entry)
+
+        return unique, replays, collisions
+
+    def _park_collisions(self, collisions):
+        """Коллизии id сразу уходят в dead-stream: повтор записи их не исправит"""
+        for stream_id, entry in collisions:
+            self.buffer.dead_letter(stream_id, entry, "Коллизия id уведомления")
+            logger.error(
+                "Коллизия id в буфере приема",
+                extra={
+                    "event": "ingest_id_collision",
+                    "stream_id": stream_id,
+                    "notification_id": entry["id"],
+                },
+            )
+
+    def _collect(self):
+        """Копит пачку до batch_size записей или до истечения interval"""
+        entries = {}
+        deadline = time.monotonic() + self.interval
+
+        while len(entries) < self.batch_size:
+            block_ms = int((deadline - time.monotonic()) * 1000)
+            if block_ms <= 0:
+                break
+            read = self.buffer.read(
+                self.consumer, self.batch_size - len(entries), block_ms
+            )
+            if read and all(stream_id in entries for stream_id, _ in read):
+                # XAUTOCLAIM вернул уже забранные в эту пачку записи
+                break
+            entries.update(read)
+
+        return list(entries.items())
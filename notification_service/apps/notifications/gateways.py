@@ -1,5 +1,4 @@
 import logging
-import os
 
 import requests
 from django.conf import settings
@@ -8,6 +7,18 @@ from django.core.mail import send_mail
 logger = logging.getLogger(__name__)
 
 
+class DeliveryResult:
+    """Итог отправки: успех, id сообщения у провайдера и текст ошибки"""
+
+    def __init__(self, success, provider_id="", error=""):
+        self.success = success
+        self.provider_id = str(provider_id or "")
+        self.error = error
+
+    def __bool__(self):
+        return self.success
+
+
 class EmailGateway:
     """Сервис отправки через email"""
 
@@ -24,18 +35,18 @@ class EmailGateway:
             fail_silently=False,
         )
 
-        return True
+        return DeliveryResult(True)
 
 
 class TelegramGateway:
     """Сервис отправки через ТГ"""
 
     def send(self, notification, payload):
-        chat_id = os.getenv("CHAT_ID")
+        chat_id = payload.get("chat_id")
         message = payload.get("message")
 
         if not chat_id:
-            return False
+            return DeliveryResult(False, error="Не указан chat_id")
 
         bot_token = settings.TELEGRAM_BOT_TOKEN
         url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
@@ -46,8 +57,12 @@ class TelegramGateway:
             timeout=10,
         )
 
-        success = response.status_code == 200
-        return success
+        if response.status_code != 200:
+            return DeliveryResult(
+                False, error=f"HTTP {response.status_code}: {response.text[:200]}"
+            )
+        message_id = response.json().get("result", {}).get("message_id")
+        return DeliveryResult(True, provider_id=message_id)
 
 
 class SMSGateway:
@@ -55,20 +70,19 @@ class SMSGateway:
 
     def send(self, notification, payload):
         try:
+            # Номер нормализован при приеме уведомления (RecipientNormalizer)
             phone = payload.get("phone")
             message = payload.get("message", notification.message)
 
             if not phone:
                 logger.error("Номер телефона не указан в SMS payload")
-                return False
-
-            formatted_phone = self._format_phone(phone)
+                return DeliveryResult(False, error="Номер телефона не указан")
 
             response = requests.post(
                 settings.SMS_API_URL,
                 data={
                     "api_id": settings.SMS_API_ID,
-                    "to": formatted_phone,
+                    "to": phone,
                     "msg": message,
                     "json": 1,
                     "from": settings.SMS_FROM,
@@ -81,51 +95,54 @@ class SMSGateway:
 
                 if result.get("status") == "OK":
                     sms_data = result.get("sms", {})
-                    phone_data = sms_data.get(formatted_phone, {})
+                    phone_data = sms_data.get(phone, {})
 
                     if phone_data.get("status") == "OK":
                         logger.info(
                             "SMS успешно отправлено",
                             extra={
-                                "phone": formatted_phone,
+                                "event": "sms_sent",
+                                "phone": phone,
                                 "sms_id": phone_data.get("sms_id"),
                                 "cost": phone_data.get("cost"),
                                 "notification_id": str(notification.id),
                             },
                         )
-                        return True
+                        return DeliveryResult(
+                            True, provider_id=phone_data.get("sms_id")
+                        )
                     else:
                         error_msg = phone_data.get("status_text", "Неизвестная ошибка")
                         logger.error(
                             "Ошибка доставки SMS",
                             extra={
-                                "phone": formatted_phone,
+                                "phone": phone,
                                 "error": error_msg,
                                 "notification_id": str(notification.id),
                             },
                         )
-                        return False
+                        return DeliveryResult(False, error=error_msg)
                 else:
                     error_msg = result.get("status_text", "Неизвестная ошибка")
                     logger.error(
                         "Ошибка SMS.ru API",
                         extra={
-                            "phone": formatted_phone,
+                            "phone": phone,
                             "error": error_msg,
                             "notification_id": str(notification.id),
                         },
                     )
-                    return False
+                    return DeliveryResult(False, error=error_msg)
             else:
                 logger.error(
                     "HTTP ошибка от SMS.ru",
                     extra={
-                        "phone": formatted_phone,
+                        "phone": phone,
                         "status_code": response.status_code,
                         "notification_id": str(notification.id),
                     },
                 )
-                return False
+                return DeliveryResult(False, error=f"HTTP {response.status_code}")
 
         except requests.exceptions.Timeout:
             logger.error(
@@ -135,7 +152,7 @@ class SMSGateway:
                     "notification_id": str(notification.id),
                 },
             )
-            return False
+            return DeliveryResult(False, error="Таймаут подключения к SMS.ru")
         except requests.exceptions.ConnectionError:
             logger.error(
                 "Ошибка подключения к SMS.ru",
@@ -144,7 +161,7 @@ class SMSGateway:
                     "notification_id": str(notification.id),
                 },
             )
-            return False
+            return DeliveryResult(False, error="Ошибка подключения к SMS.ru")
         except Exception as e:
             logger.error(
                 "Неожиданная ошибка при отправке SMS",
@@ -156,18 +173,7 @@ class SMSGateway:
                 },
                 exc_info=True,
             )
-            return False
-
-    def _format_phone(self, phone):
-        cleaned = "".join(filter(str.isdigit, phone))
-
-        if cleaned.startswith("89") and len(cleaned) == 11:
-            cleaned = "+7" + cleaned[1:]
-
-        if cleaned.startswith("79") and len(cleaned) == 11:
-            cleaned = "+" + cleaned
-
-        return cleaned
+            return DeliveryResult(False, error=f"{type(e).__name__}: {e}")
 
 
 class DeliveryService:
@@ -183,5 +189,5 @@ class DeliveryService:
     def send_via_method(self, method, notification, payload):
         gateway = self.gateways.get(method)
         if not gateway:
-            return False
+            return DeliveryResult(False, error=f"Неизвестный канал {method}")
         return gateway.send(notification, payload)
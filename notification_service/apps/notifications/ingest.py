@@ -0,0 +1,182 @@
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.notifications.db_router import REPLICA
+from apps.notifications.models import NotificationMethod
+from apps.notifications.recipients import UndeliverableNotification
+from apps.notifications.services import NotificationService
+
+logger = logging.getLogger(__name__)
+
+INGEST_PATH = "/api/ingest/notifications/"
+MAX_BODY_SIZE = 64 * 1024
+
+METHODS = frozenset(NotificationMethod.values)
+
+
+def validate_notification_payload(data):
+    """Легковесный аналог CreateNotificationSerializer: возвращает (данные, ошибки)"""
+    if not isinstance(data, dict):
+        return None, {"non_field_errors": ["Ожидается JSON-объект."]}
+
+    errors = {}
+
+    user_id = data.get("user_id")
+    if isinstance(user_id, bool) or not isinstance(user_id, int):
+        errors["user_id"] = ["Требуется целое число."]
+
+    title = data.get("title")
+    if not isinstance(title, str) or not title.strip():
+        errors["title"] = ["Обязательное поле."]
+    elif len(title) > 200:
+        errors["title"] = ["Не более 200 символов."]
+
+    message = data.get("message")
+    if not isinstance(message, str) or not message.strip():
+        errors["message"] = ["Обязательное поле."]
+
+    # Без delivery_methods каналы берутся из предпочтений получателя
+    methods = data.get("delivery_methods") or None
+    # Проверяем каждый элемент до set(): [{}] или [["SMS"]] не хешируются
+    if methods is not None and (
+        not isinstance(methods, list)
+        or not all(isinstance(method, str) and method in METHODS for method in methods)
+    ):
+        errors["delivery_methods"] = [f"Допустимые значения: {sorted(METHODS)}."]
+
+    notification_type = data.get("notification_type", "")
+    if not isinstance(notification_type, str) or len(notification_type) > 50:
+        errors["notification_type"] = ["Строка не длиннее 50 символов."]
+
+    send_at = data.get("send_at")
+    if send_at is not None:
+        try:
+            send_at = parse_datetime(send_at) if isinstance(send_at, str) else None
+        except ValueError:
+            # Формат верный, но даты нет: "2026-02-30T00:00:00Z"
+            send_at = None
+        if send_at is None or timezone.is_naive(send_at):
+            errors["send_at"] = ["Ожидается дата и время с часовым поясом (ISO 8601)."]
+
+    if errors:
+        return None, errors
+
+    return {
+        "user_id": user_id,
+        "title": title,
+        "message": message,
+        "methods": methods,
+        "send_at": send_at,
+        "notification_type": notification_type,
+    }, None
+
+
+def _submit_notification(validated):
+    # Аналог request_started/request_finished: соблюдаем CONN_MAX_AGE в потоке пула
+    close_old_connections()
+    try:
+        service = NotificationService()
+        if settings.NOTIFICATION_INGEST_MODE == "buffered":
+            return 202, {
+                "id": service.enqueue_notification(**validated),
+                "status": "accepted",
+            }
+        return 201, {
+            "id": service.create_notification(**validated).id,
+            "status": "created",
+        }
+    finally:
+        close_old_connections()
+
+
+# Транзакция create_notification должна выполняться в одном потоке, а async ORM
+# транзакций не поддерживает; thread_sensitive=False позволяет запросам идти
+# параллельно в пуле потоков, а не по очереди в главном.
+submit_notification = sync_to_async(_submit_notification, thread_sensitive=False)
+
+
+class IngestApplication:
+    """ASGI-приложение быстрого приема уведомлений без DRF и middleware Django"""
+
+    async def __call__(self, scope, receive, send):
+        if scope["method"] != "POST":
+            return await self._respond(send, 405, {"detail": "Method not allowed."})
+
+        body = await self._read_body(receive)
+        if body is None:
+            return await self._respond(send, 413, {"detail": "Request too large."})
+
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return await self._respond(send, 400, {"detail": "Invalid JSON."})
+
+        validated, errors = validate_notification_payload(data)
+        if errors:
+            return await self._respond(send, 400, errors)
+
+        try:
+            status, result = await submit_notification(validated)
+        except UndeliverableNotification as e:
+            return await self._respond(send, 400, {"delivery_methods": [str(e)]})
+        except Exception:
+            logger.exception(
+                "Ошибка приема уведомления", extra={"event": "ingest_error"}
+            )
+            return await self._respond(send, 500, {"detail": "Internal error."})
+
+        return await self._respond(send, status, result)
+
+    async def _read_body(self, receive):
+        body = b""
+        while True:
+            event = await receive()
+            body += event.get("body", b"")
+            if len(body) > MAX_BODY_SIZE:
+                return None
+            if not event.get("more_body"):
+                return body
+
+    async def _respond(self, send, status, data):
+        content = json.dumps(data, ensure_ascii=False).encode()
+        headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(content)).encode()),
+        ]
+        if status in (201, 202) and REPLICA in settings.DATABASES:
+            # Как ReplicaRoutingMiddleware: чтения клиента после записи — с primary
+            headers.append(
+                (
+                    b"set-cookie",
+                    f"{settings.REPLICA_STICKY_COOKIE}=1; "
+                    f"Max-Age={settings.REPLICA_STICKY_SECONDS}; "
+                    "Path=/; HttpOnly; SameSite=Lax".encode(),
+                )
+            )
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": headers,
+            }
+        )
+        await send({"type": "http.response.body", "body": content})
+
+
+class IngestRouter:
+    """Отдает INGEST_PATH в IngestApplication, остальное — обычному Django"""
+
+    def __init__(self, django_application):
+        self.django_application = django_application
+        self.ingest_application = IngestApplication()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == INGEST_PATH:
+            return await self.ingest_application(scope, receive, send)
+        return await self.django_application(scope, receive, send)
@@ -0,0 +1,104 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from celery.signals import worker_process_shutdown
+
+# Атрибуты, которые есть у любого LogRecord: всё остальное пришло через extra
+RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Форматирует запись в одну JSON-строку, перенося поля из extra как есть"""
+
+    def format(self, record):
+        data = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in RESERVED_ATTRS:
+                data[key] = value
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает только долю `rate` записей с event из `events`, остальные — все"""
+
+    def __init__(self, rate=1.0, events=("delivery_sent", "sms_sent")):
+        super().__init__()
+        self.rate = float(rate)
+        self.events = frozenset(events)
+
+    def filter(self, record):
+        if self.rate >= 1 or getattr(record, "event", None) not in self.events:
+            return True
+        return random.random() < self.rate
+
+
+class QueueListenerHandler(QueueHandler):
+    """QueueHandler, который сам поднимает фоновый QueueListener.
+
+    В вызывающем потоке запись только кладется в очередь; форматирование в JSON
+    и запись в консоль/файл выполняет поток listener-а.
+    """
+
+    def __init__(self, filename=None, stream=None, console=True):
+        super().__init__(queue.SimpleQueue())
+
+        handlers = []
+        if console:
+            handlers.append(logging.StreamHandler(stream or sys.stderr))
+        if filename:
+            handlers.append(logging.FileHandler(filename, delay=True))
+        for handler in handlers:
+            handler.setFormatter(JsonFormatter())
+
+        self.targets = handlers
+        self._listening = False
+        self._start_listener()
+        atexit.register(self._stop_listener)
+        # Дочерние процессы prefork-пула завершаются через os._exit, минуя atexit
+        # (без dispatch_uid Celery подключает метод только первого экземпляра)
+        worker_process_shutdown.connect(
+            self._on_worker_shutdown, weak=False, dispatch_uid=id(self)
+        )
+        # Дочерние процессы prefork-пула наследуют очередь, но не поток listener-а
+        os.register_at_fork(after_in_child=self._reset)
+
+    def prepare(self, record):
+        # Записи не покидают процесс, поэтому не форматируем их заранее
+        return record
+
+    def close(self):
+        self._stop_listener()
+        super().close()
+
+    def _start_listener(self):
+        self.listener = QueueListener(self.queue, *self.targets)
+        self.listener.start()
+        self._listening = True
+
+    def _stop_listener(self):
+        if self._listening:
+            self._listening = False
+            self.listener.stop()
+
+    def _on_worker_shutdown(self, **kwargs):
+        self._stop_listener()
+
+    def _reset(self):
+        # Унаследованную копию очереди допишет родитель: иначе записи задвоятся
+        self.queue = queue.SimpleQueue()
+        self._start_listener()
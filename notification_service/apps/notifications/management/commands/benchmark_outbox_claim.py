@@ -0,0 +1,123 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.notifications.models import (
+    Notification,
+    OutboxClaimer,
+    OutboxMessage,
+    OutboxShardLease,
+    OutboxStatus,
+)
+from apps.notifications.sharding import ShardLeaseManager, shard_for
+from apps.notifications.tasks import claim_outbox_messages
+
+BENCH_TITLE = "benchmark_outbox_claim"
+
+
+class Command(BaseCommand):
+    help = (
+        "Бенчмарк пропускной способности claim-а outbox: "
+        "общий поллер против шардированных claimer-ов"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=5000)
+        parser.add_argument("--claimers", default="1,2,4,8")
+        parser.add_argument(
+            "--dispatch-delay",
+            type=float,
+            default=0.005,
+            help="Имитация публикации задач в брокер после claim-а (сек)",
+        )
+
+    def handle(self, *args, **options):
+        claimer_counts = [int(value) for value in options["claimers"].split(",")]
+
+        self.stdout.write(
+            f"{'claimers':>8} | {'mode':>8} | {'msgs/s':>10} | {'seconds':>8}"
+        )
+        for count in claimer_counts:
+            for sharded in (False, True):
+                self._seed(options["messages"])
+                elapsed = self._run(count, sharded, options["dispatch_delay"])
+                mode = "sharded" if sharded else "shared"
+                self.stdout.write(
+                    f"{count:>8} | {mode:>8} | "
+                    f"{options['messages'] / elapsed:>10.0f} | {elapsed:>8.2f}"
+                )
+        self._cleanup()
+
+    def _seed(self, total):
+        self._cleanup()
+        notifications = Notification.objects.bulk_create(
+            [
+                Notification(user_id=0, title=BENCH_TITLE, message="")
+                for _ in range(total)
+            ]
+        )
+        OutboxMessage.objects.bulk_create(
+            [
+                OutboxMessage(
+                    notification=notification,
+                    method="SMS",
+                    payload={},
+                    shard=shard_for(notification.id),
+                )
+                for notification in notifications
+            ],
+            batch_size=1000,
+        )
+
+    def _cleanup(self):
+        Notification.objects.filter(title=BENCH_TITLE).delete()
+        OutboxShardLease.objects.filter(owner__startswith="bench-").update(owner="")
+        OutboxClaimer.objects.filter(name__startswith="bench-").delete()
+
+    def _run(self, count, sharded, dispatch_delay):
+        managers = [ShardLeaseManager(f"bench-{index}") for index in range(count)]
+        assignments = [None] * count
+
+        if sharded:
+            # Несколько раундов heartbeat, пока шарды не разойдутся поровну
+            for _ in range(count + 2):
+                assignments = [manager.heartbeat() for manager in managers]
+
+        def claimer(index):
+            try:
+                while True:
+                    ids = claim_outbox_messages(assignments[index])
+                    if not ids:
+                        break
+                    time.sleep(dispatch_delay)
+                    OutboxMessage.objects.filter(id__in=ids).update(
+                        status=OutboxStatus.SENT
+                    )
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=claimer, args=(index,)) for index in range(count)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        for manager in managers:
+            manager.release()
+
+        remaining = OutboxMessage.objects.filter(
+            notification__title=BENCH_TITLE, status=OutboxStatus.PENDING
+        ).count()
+        if remaining:
+            self.stderr.write(
+                f"Осталось {remaining} сообщений: шарды без владельца "
+                f"(OUTBOX_SHARD_COUNT={settings.OUTBOX_SHARD_COUNT})"
+            )
+        return elapsed
@@ -0,0 +1,142 @@
+import random
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from rest_framework.test import APIClient
+
+from apps.notifications.db_router import PRIMARY, REPLICA
+from apps.notifications.models import Notification, OutboxMessage, OutboxStatus
+from apps.notifications.services import NotificationService
+from apps.notifications.tasks import claim_outbox_messages
+
+BENCH_TITLE = "benchmark_replica_reads"
+
+
+class Command(BaseCommand):
+    help = (
+        "Бенчмарк чтений API: primary против реплики под нагрузкой outbox-писателей, "
+        "с постоянными соединениями и без. Нужны два Postgres: "
+        "docker compose --profile replica up"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=5000)
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--readers", type=int, default=8)
+        parser.add_argument("--writers", type=int, default=2)
+        parser.add_argument("--conn-max-age", default="0,60")
+        parser.add_argument("--lag-timeout", type=float, default=30)
+
+    def handle(self, *args, **options):
+        if REPLICA not in settings.DATABASES:
+            raise CommandError("Реплика не настроена: задайте POSTGRES_REPLICA_HOST")
+
+        ids = self._seed(options["seed"], options["lag_timeout"])
+
+        self.stdout.write(
+            f"{'reads':>7} | {'max_age':>7} | {'req/s':>8} | {'p50 ms':>8} | "
+            f"{'p95 ms':>8} | {'writes/s':>8}"
+        )
+        try:
+            for max_age in [int(value) for value in options["conn_max_age"].split(",")]:
+                for target in (PRIMARY, REPLICA):
+                    for alias in (PRIMARY, REPLICA):
+                        connections.settings[alias]["CONN_MAX_AGE"] = max_age
+                    latencies, elapsed, writes = self._run(
+                        ids,
+                        target,
+                        options["requests"],
+                        options["readers"],
+                        options["writers"],
+                    )
+                    quantiles = statistics.quantiles(latencies, n=100)
+                    self.stdout.write(
+                        f"{target:>7} | {max_age:>7} | "
+                        f"{len(latencies) / elapsed:>8.0f} | "
+                        f"{quantiles[49] * 1000:>8.1f} | {quantiles[94] * 1000:>8.1f} | "
+                        f"{writes / elapsed:>8.0f}"
+                    )
+        finally:
+            Notification.objects.filter(title=BENCH_TITLE).delete()
+
+    def _seed(self, total, lag_timeout):
+        Notification.objects.filter(title=BENCH_TITLE).delete()
+        notifications = Notification.objects.bulk_create(
+            [
+                Notification(user_id=1, title=BENCH_TITLE, message="")
+                for _ in range(total)
+            ],
+            batch_size=1000,
+        )
+
+        # Ждем, пока реплика догонит засеянные данные
+        deadline = time.monotonic() + lag_timeout
+        replica = Notification.objects.using(REPLICA).filter(title=BENCH_TITLE)
+        while replica.count() < total:
+            if time.monotonic() > deadline:
+                raise CommandError("Реплика не догнала primary за --lag-timeout")
+            time.sleep(0.5)
+
+        return [notification.id for notification in notifications]
+
+    def _run(self, ids, target, total, readers, writers):
+        remaining = iter(range(total))
+        pages = max(len(ids) // settings.REST_FRAMEWORK["PAGE_SIZE"], 1)
+        latencies = []
+        writes = 0
+        done = threading.Event()
+        lock = threading.Lock()
+
+        def reader():
+            client = APIClient()
+            if target == PRIMARY:
+                # Cookie read-your-writes: все чтения клиента идут в primary
+                client.cookies[settings.REPLICA_STICKY_COOKIE] = "1"
+            try:
+                for index in remaining:
+                    if index % 2:
+                        path = f"/api/notifications/{random.choice(ids)}/"
+                    else:
+                        path = f"/api/notifications/?page={random.randint(1, pages)}"
+                    started = time.perf_counter()
+                    client.get(path)
+                    with lock:
+                        latencies.append(time.perf_counter() - started)
+            finally:
+                connections.close_all()
+
+        def writer():
+            nonlocal writes
+            service = NotificationService()
+            try:
+                while not done.is_set():
+                    service.create_notification(
+                        user_id=1, title=BENCH_TITLE, message="", methods=["SMS"]
+                    )
+                    claimed = claim_outbox_messages(limit=10)
+                    OutboxMessage.objects.filter(
+                        id__in=claimed, notification__title=BENCH_TITLE
+                    ).update(status=OutboxStatus.SENT)
+                    with lock:
+                        writes += 1
+            finally:
+                connections.close_all()
+
+        reader_threads = [threading.Thread(target=reader) for _ in range(readers)]
+        writer_threads = [threading.Thread(target=writer) for _ in range(writers)]
+
+        started = time.perf_counter()
+        for thread in writer_threads + reader_threads:
+            thread.start()
+        for thread in reader_threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        done.set()
+        for thread in writer_threads:
+            thread.join()
+
+        return latencies, elapsed, writes
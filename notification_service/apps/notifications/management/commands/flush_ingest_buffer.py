@@ -0,0 +1,53 @@
+import logging
+import os
+import signal
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.notifications.flusher import IngestFlusher
+
+logger = logging.getLogger(__name__)
+
+MAX_BACKOFF_SECONDS = 30
+
+
+def _stop(signum, frame):
+    raise KeyboardInterrupt
+
+
+class Command(BaseCommand):
+    help = "Переносит буфер приема из Redis stream в Postgres групповыми коммитами"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--name",
+            default=f"{socket.gethostname()}-{os.getpid()}",
+            help="Имя consumer-а в группе Redis stream",
+        )
+
+    def handle(self, *args, **options):
+        signal.signal(signal.SIGTERM, _stop)
+        flusher = IngestFlusher(options["name"])
+        flusher.buffer.ensure_group()
+
+        self.stdout.write(f"Flusher {flusher.consumer} запущен")
+        failures = 0
+        try:
+            while True:
+                try:
+                    flusher.run_once()
+                    failures = 0
+                except Exception:
+                    # Неподтвержденные записи останутся в stream и будут повторены
+                    failures += 1
+                    logger.exception(
+                        "Ошибка записи буфера приема",
+                        extra={"event": "ingest_error", "failures": failures},
+                    )
+                    close_old_connections()
+                    time.sleep(min(2**failures, MAX_BACKOFF_SECONDS))
+        except KeyboardInterrupt:
+            pass
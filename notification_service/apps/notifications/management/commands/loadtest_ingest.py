@@ -0,0 +1,114 @@
+import asyncio
+import json
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand
+
+from apps.notifications.ingest import INGEST_PATH
+
+ENDPOINTS = {
+    "drf": "/api/notifications/",
+    "ingest": INGEST_PATH,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный тест: NotificationViewSet.create против async-эндпоинта "
+        "приема. Сервер запускается отдельно: uvicorn config.asgi:application"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument("--requests", type=int, default=5000)
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--endpoints", default="drf,ingest")
+
+    def handle(self, *args, **options):
+        url = urlsplit(options["base_url"])
+
+        self.stdout.write(
+            f"{'endpoint':>8} | {'req/s':>8} | {'p50 ms':>8} | "
+            f"{'p99 ms':>8} | {'errors':>6}"
+        )
+        for name in options["endpoints"].split(","):
+            latencies, errors, elapsed = asyncio.run(
+                self._run(
+                    url.hostname,
+                    url.port or 80,
+                    ENDPOINTS[name],
+                    options["requests"],
+                    options["concurrency"],
+                )
+            )
+            quantiles = statistics.quantiles(latencies, n=100)
+            self.stdout.write(
+                f"{name:>8} | {len(latencies) / elapsed:>8.0f} | "
+                f"{quantiles[49] * 1000:>8.1f} | {quantiles[98] * 1000:>8.1f} | "
+                f"{errors:>6}"
+            )
+
+    async def _run(self, host, port, path, total, concurrency):
+        body = json.dumps(
+            {
+                "user_id": 1,
+                "title": "loadtest",
+                "message": "loadtest",
+                "delivery_methods": ["SMS"],
+            }
+        ).encode()
+        request = (
+            f"POST {path} HTTP/1.1\r\n"
+            f"Host: {host}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "\r\n"
+        ).encode() + body
+
+        latencies = []
+        errors = 0
+        remaining = iter(range(total))
+
+        async def worker():
+            nonlocal errors
+            reader, writer = await asyncio.open_connection(host, port)
+            for _ in remaining:
+                started = time.perf_counter()
+                try:
+                    writer.write(request)
+                    status = await self._read_response(reader)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    writer.close()
+                    reader, writer = await asyncio.open_connection(host, port)
+                    status = None
+                latencies.append(time.perf_counter() - started)
+                if status not in (201, 202):
+                    errors += 1
+            writer.close()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return latencies, errors, time.perf_counter() - started
+
+    async def _read_response(self, reader):
+        status_line = await reader.readline()
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            key, _, value = line.decode().partition(":")
+            headers[key.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding") == "chunked":
+            while True:
+                size = int((await reader.readline()).strip(), 16)
+                await reader.readexactly(size + 2)
+                if not size:
+                    break
+        else:
+            await reader.readexactly(int(headers.get("content-length", 0)))
+
+        return int(status_line.split()[1])
@@ -0,0 +1,100 @@
+from unittest import mock
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import override_settings
+
+from apps.notifications.gateways import DeliveryResult, DeliveryService
+from apps.notifications.models import OutboxMessage, OutboxStatus
+from apps.notifications.profiling import PERF_BUDGETS, QueryProfiler
+from apps.notifications.services import NotificationService
+from apps.notifications.tasks import (
+    process_pending_outbox_messages,
+    process_single_outbox_message,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Отчет по горячим путям: SQL count, SQL time и wall time против бюджетов. "
+        "Все изменения в БД откатываются, отправка во внешние шлюзы заглушена."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=10)
+        parser.add_argument(
+            "--fail-over-budget",
+            action="store_true",
+            help="Завершиться с ошибкой, если какой-то путь превысил бюджет",
+        )
+
+    def handle(self, *args, **options):
+        hot_paths = {
+            "create_notification": (lambda: None, self._create_notification),
+            "process_pending_outbox_messages": (
+                lambda: self._pending_messages(50),
+                lambda ids: process_pending_outbox_messages(),
+            ),
+            "process_single_outbox_message": (
+                lambda: self._pending_messages(1, status=OutboxStatus.ENQUEUED),
+                lambda ids: process_single_outbox_message(ids[0]),
+            ),
+        }
+
+        self.stdout.write(
+            f"{'hot path':>32} | {'sql':>4} | {'budget':>6} | "
+            f"{'sql ms':>8} | {'wall ms':>8}"
+        )
+        over_budget = []
+        # Кэш процесса вместо Redis: отчету не нужна инфраструктура, кроме БД
+        with mock.patch.object(
+            DeliveryService, "send_via_method", return_value=DeliveryResult(True)
+        ), mock.patch.object(process_single_outbox_message, "delay"), mock.patch(
+            "apps.notifications.tasks.recorder"
+        ), override_settings(
+            CACHES={
+                "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+            }
+        ):
+            for name, (setup, run) in hot_paths.items():
+                profilers = [
+                    self._measure(setup, run) for _ in range(options["repeat"])
+                ]
+                sql_count = max(profiler.sql_count for profiler in profilers)
+                sql_time = sum(p.sql_time for p in profilers) / len(profilers)
+                wall_time = sum(p.wall_time for p in profilers) / len(profilers)
+
+                budget = PERF_BUDGETS[name]
+                if sql_count > budget:
+                    over_budget.append(name)
+                self.stdout.write(
+                    f"{name:>32} | {sql_count:>4} | {budget:>6} | "
+                    f"{sql_time * 1000:>8.2f} | {wall_time * 1000:>8.2f}"
+                )
+
+        if over_budget and options["fail_over_budget"]:
+            raise CommandError(f"Превышен бюджет запросов: {', '.join(over_budget)}")
+
+    def _measure(self, setup, run):
+        with transaction.atomic():
+            argument = setup()
+            with QueryProfiler() as profiler:
+                run(argument)
+            transaction.set_rollback(True)
+        return profiler
+
+    def _create_notification(self, argument):
+        NotificationService().create_notification(
+            user_id=1, title="perf_report", message="perf_report", methods=["SMS"]
+        )
+
+    def _pending_messages(self, count, status=OutboxStatus.PENDING):
+        service = NotificationService()
+        ids = []
+        for _ in range(count):
+            notification = service.create_notification(
+                user_id=1, title="perf_report", message="perf_report"
+            )
+            ids.append(notification.outbox_messages.get().id)
+        OutboxMessage.objects.filter(id__in=ids).update(status=status)
+        return ids
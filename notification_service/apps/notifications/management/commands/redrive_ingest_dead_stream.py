@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.notifications.buffer import IngestBuffer
+
+
+class Command(BaseCommand):
+    help = "Возвращает записи из INGEST_DEAD_STREAM в stream буферизованного приема"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, help="Не больше N записей")
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Только посчитать записи"
+        )
+
+    def handle(self, *args, **options):
+        buffer = IngestBuffer()
+        if options["dry_run"]:
+            total = buffer.client.xlen(settings.INGEST_DEAD_STREAM)
+            self.stdout.write(f"Записей в {settings.INGEST_DEAD_STREAM}: {total}")
+            return
+
+        redriven = buffer.redrive(options["limit"])
+        self.stdout.write(self.style.SUCCESS(f"Возвращено в прием: {redriven}"))
@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from apps.notifications.dead_letters import DeadLetterReplayer, select_dead_letters
+from apps.notifications.models import NotificationMethod
+
+
+class Command(BaseCommand):
+    help = "Повторно ставит dead letters в outbox с ограничением скорости"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--method",
+            choices=NotificationMethod.values,
+            help="Только dead letters этого канала",
+        )
+        parser.add_argument(
+            "--since", type=parse_datetime, help="Созданные не раньше (ISO 8601)"
+        )
+        parser.add_argument(
+            "--until", type=parse_datetime, help="Созданные не позже (ISO 8601)"
+        )
+        parser.add_argument("--reason-contains", help="Подстрока причины отказа")
+        parser.add_argument("--limit", type=int, help="Не больше N записей")
+        parser.add_argument(
+            "--to-method",
+            choices=NotificationMethod.values,
+            help="Повторить через другой канал",
+        )
+        parser.add_argument("--rate", type=float, help="Сообщений в секунду")
+        parser.add_argument("--batch-size", type=int, help="Записей в одной транзакции")
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Только посчитать подходящие записи"
+        )
+
+    def handle(self, *args, **options):
+        if options["rate"] is not None and not (
+            0 < options["rate"] <= settings.DEAD_LETTER_REPLAY_MAX_RATE
+        ):
+            raise CommandError(
+                "--rate должен быть в пределах (0, "
+                f"{settings.DEAD_LETTER_REPLAY_MAX_RATE:g}]: DEAD_LETTER_REPLAY_MAX_RATE"
+            )
+
+        queryset = select_dead_letters(
+            method=options["method"],
+            reason_contains=options["reason_contains"],
+            created_after=options["since"],
+            created_before=options["until"],
+            limit=options["limit"],
+        )
+
+        if options["dry_run"]:
+            self.stdout.write(f"Подходящих dead letters: {queryset.count()}")
+            return
+
+        replayer = DeadLetterReplayer(
+            rate=options["rate"], batch_size=options["batch_size"]
+        )
+        result = replayer.replay(queryset, method=options["to_method"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Поставлено на повтор: {result['replayed']}, "
+                f"пропущено без адреса: {result['skipped']}, "
+                f"скорость: {replayer.rate:g}/с"
+            )
+        )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from apps.notifications.sharding import reshard_outbox
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает шарды неотправленных outbox-сообщений под OUTBOX_SHARD_COUNT"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="Сообщений в одной транзакции"
+        )
+
+    def handle(self, *args, **options):
+        moved = reshard_outbox(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Перенесено сообщений: {moved}"))
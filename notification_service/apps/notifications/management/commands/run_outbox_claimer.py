@@ -0,0 +1,91 @@
+import logging
+import os
+import signal
+import socket
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.notifications.sharding import ShardLeaseManager
+from apps.notifications.tasks import (
+    claim_outbox_messages,
+    process_single_outbox_message,
+)
+
+logger = logging.getLogger(__name__)
+
+MAX_BACKOFF_SECONDS = 30
+
+
+def _stop(signum, frame):
+    raise KeyboardInterrupt
+
+
+class Command(BaseCommand):
+    help = "Claimer outbox-сообщений, обрабатывающий только арендованные шарды"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--name",
+            default=f"{socket.gethostname()}-{os.getpid()}",
+            help="Уникальное имя claimer-а",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Пауза между опросами, если шарды пусты (сек)",
+        )
+
+    def handle(self, *args, **options):
+        signal.signal(signal.SIGTERM, _stop)
+        manager = ShardLeaseManager(options["name"])
+        heartbeat_every = settings.OUTBOX_SHARD_LEASE_TTL / 3
+        next_heartbeat = 0.0
+        shards = []
+
+        self.stdout.write(f"Claimer {manager.owner} запущен")
+        failures = 0
+        try:
+            while True:
+                try:
+                    if time.monotonic() >= next_heartbeat:
+                        # Без продленной аренды шарды не опрашиваем: их мог забрать сосед
+                        shards = []
+                        shards = manager.heartbeat()
+                        next_heartbeat = time.monotonic() + heartbeat_every
+                        logger.debug(
+                            "Heartbeat claimer-а",
+                            extra={"owner": manager.owner, "shards": shards},
+                        )
+
+                    message_ids = claim_outbox_messages(shards) if shards else []
+                    for message_id in message_ids:
+                        process_single_outbox_message.delay(message_id)
+                    failures = 0
+                except ImproperlyConfigured:
+                    raise
+                except Exception:
+                    # ENQUEUED-сообщения, не попавшие в очередь, повторный claim заберет через минуту
+                    failures += 1
+                    logger.exception(
+                        "Ошибка claimer-а outbox",
+                        extra={
+                            "event": "outbox_claimer_error",
+                            "owner": manager.owner,
+                            "failures": failures,
+                        },
+                    )
+                    close_old_connections()
+                    time.sleep(min(2**failures, MAX_BACKOFF_SECONDS))
+                    continue
+
+                if len(message_ids) < settings.OUTBOX_CLAIM_BATCH_SIZE:
+                    time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            manager.release()
@@ -0,0 +1,75 @@
+# Generated by Django 5.1.6 on 2026-10-19 16:56
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def assign_shards(apps, schema_editor):
+    OutboxMessage = apps.get_model("notifications", "OutboxMessage")
+    OutboxMessage.objects.update(
+        shard=F("notification_id") % settings.OUTBOX_SHARD_COUNT
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("notifications", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxClaimer",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+                (
+                    "heartbeat_at",
+                    models.DateTimeField(
+                        db_index=True, default=django.utils.timezone.now
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="OutboxShardLease",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("shard", models.PositiveSmallIntegerField(unique=True)),
+                ("owner", models.CharField(blank=True, default="", max_length=100)),
+                ("expires_at", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                "ordering": ["shard"],
+            },
+        ),
+        migrations.AddField(
+            model_name="outboxmessage",
+            name="shard",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="outboxmessage",
+            index=models.Index(
+                fields=["status", "shard"], name="outbox_status_shard_idx"
+            ),
+        ),
+        migrations.RunPython(assign_shards, migrations.RunPython.noop),
+    ]
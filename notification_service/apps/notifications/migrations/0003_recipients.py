@@ -0,0 +1,165 @@
+# Generated by Django 5.1.6 on 2026-10-19 17:05
+
+import re
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Логика скопирована на момент миграции, как и исторические модели из
+# apps.get_model: последующие изменения сервиса не должны менять ее результат.
+NON_DIGITS = re.compile(r"\D+")
+EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+CHAT_ID = re.compile(r"^(-?\d+|@[A-Za-z][A-Za-z0-9_]{4,})$")
+
+FALLBACK_ORDER = ["SMS", "TELEGRAM", "EMAIL"]
+# Поле адреса в payload канала
+PAYLOAD_FIELDS = {"SMS": "phone", "EMAIL": "to_email", "TELEGRAM": "chat_id"}
+USER_DATA_FIELDS = {"SMS": "phone", "EMAIL": "email", "TELEGRAM": "telegram_chat_id"}
+USER_DATA = {
+    1: {
+        "email": "test1@mail.ru",
+        "phone": "+79001234567",
+        "telegram_chat_id": "123456789",
+    },
+    2: {
+        "email": "test2@mail.ru",
+        "phone": "+79007654321",
+        "telegram_chat_id": "987654321",
+    },
+}
+
+
+def normalize_phone(value):
+    digits = NON_DIGITS.sub("", str(value))
+    if len(digits) == 11 and digits[0] == "8":
+        digits = "7" + digits[1:]
+    if len(digits) == 11 and digits[0] == "7":
+        return "+" + digits
+    if 10 <= len(digits) <= 15 and str(value).lstrip().startswith("+"):
+        return "+" + digits
+    return None
+
+
+def normalize_email(value):
+    value = str(value).strip()
+    if not EMAIL.match(value):
+        return None
+    local, _, domain = value.rpartition("@")
+    return f"{local}@{domain.lower()}"
+
+
+def normalize_chat_id(value):
+    value = str(value).strip()
+    return value if CHAT_ID.match(value) else None
+
+
+NORMALIZERS = {
+    "SMS": normalize_phone,
+    "EMAIL": normalize_email,
+    "TELEGRAM": normalize_chat_id,
+}
+
+
+def normalize(method, value):
+    if value in (None, ""):
+        return None
+    return NORMALIZERS[method](value)
+
+
+def address(method, user_data):
+    value = user_data.get(USER_DATA_FIELDS[method])
+    if method == "TELEGRAM" and getattr(settings, "CHAT_ID", None):
+        value = settings.CHAT_ID
+    return normalize(method, value)
+
+
+def build_payload(method, notification, recipient):
+    if method == "EMAIL":
+        return {
+            "to_email": recipient,
+            "subject": notification.title,
+            "message": notification.message,
+        }
+    if method == "SMS":
+        return {
+            "phone": recipient,
+            "message": f"{notification.title}: {notification.message}",
+        }
+    if method == "TELEGRAM":
+        return {
+            "chat_id": recipient,
+            "message": f"*{notification.title}*\n{notification.message}",
+        }
+    return {}
+
+
+def backfill_recipients(apps, schema_editor):
+    """Адреса неотправленных сообщений, принятых до нормализации.
+
+    Адрес берется из payload, если он там есть для канала сообщения: у
+    fallback-ов payload скопирован из прошлого канала, например SMS-payload без
+    chat_id у TELEGRAM. Иначе адрес берется из данных пользователя. Payload
+    пересобирается с нормализованным адресом.
+    """
+    Notification = apps.get_model("notifications", "Notification")
+    OutboxMessage = apps.get_model("notifications", "OutboxMessage")
+
+    messages = (
+        OutboxMessage.objects.filter(status__in=["PENDING", "ENQUEUED"])
+        .select_related("notification")
+        .order_by("id")
+    )
+    notifications, batch = {}, []
+    for message in messages.iterator(chunk_size=1000):
+        notification = message.notification
+        user_data = USER_DATA.get(notification.user_id, {})
+        recipient = normalize(
+            message.method, message.payload.get(PAYLOAD_FIELDS[message.method])
+        ) or address(message.method, user_data)
+
+        message.recipient = recipient or ""
+        message.payload = build_payload(message.method, notification, recipient)
+        batch.append(message)
+
+        if notification.id not in notifications:
+            # Адреса для будущих fallback-ов; цепочку по-прежнему выбирает роутинг
+            notification.recipients = {
+                method: value
+                for method in FALLBACK_ORDER
+                if (value := address(method, user_data))
+            }
+            notifications[notification.id] = notification
+
+        if len(batch) >= 1000:
+            OutboxMessage.objects.bulk_update(batch, ["recipient", "payload"])
+            batch = []
+
+    OutboxMessage.objects.bulk_update(batch, ["recipient", "payload"])
+    Notification.objects.bulk_update(
+        notifications.values(), ["recipients"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("notifications", "0002_outbox_sharding"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="channels",
+            field=models.JSONField(default=list),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="recipients",
+            field=models.JSONField(default=dict),
+        ),
+        migrations.AddField(
+            model_name="outboxmessage",
+            name="recipient",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.RunPython(backfill_recipients, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.1.6 on 2026-10-19 17:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("notifications", "0003_recipients"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QuietHours",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("user_id", models.IntegerField(unique=True)),
+                ("start", models.TimeField()),
+                ("end", models.TimeField()),
+                ("timezone", models.CharField(default="UTC", max_length=64)),
+            ],
+            options={
+                "ordering": ["user_id"],
+            },
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="send_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="outboxmessage",
+            name="release_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="outboxmessage",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("PENDING", "В ожидании"),
+                    ("ENQUEUED", "В очереди"),
+                    ("SENT", "Отправлено"),
+                    ("FAILED", "Не удалось"),
+                    ("SCHEDULED", "Запланировано"),
+                ],
+                default="PENDING",
+                max_length=20,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="outboxmessage",
+            index=models.Index(
+                condition=models.Q(("status", "SCHEDULED")),
+                fields=["release_at"],
+                name="outbox_release_at_idx",
+            ),
+        ),
+    ]
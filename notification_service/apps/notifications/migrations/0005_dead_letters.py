@@ -0,0 +1,87 @@
+# Generated by Django 5.1.6 on 2026-10-19 17:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("notifications", "0004_scheduled_delivery"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="outboxmessage",
+            name="last_error",
+            field=models.TextField(blank=True, default=""),
+        ),
+        migrations.CreateModel(
+            name="DeadLetter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "method",
+                    models.CharField(
+                        choices=[
+                            ("SMS", "SMS"),
+                            ("EMAIL", "Email"),
+                            ("TELEGRAM", "Telegram"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("reason", models.TextField(blank=True, default="")),
+                ("attempt_count", models.IntegerField(default=0)),
+                ("replayed_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "replay_method",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("SMS", "SMS"),
+                            ("EMAIL", "Email"),
+                            ("TELEGRAM", "Telegram"),
+                        ],
+                        default="",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "notification",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="dead_letters",
+                        to="notifications.notification",
+                    ),
+                ),
+                (
+                    "outbox_message",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="dead_letter",
+                        to="notifications.outboxmessage",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["id"],
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("replayed_at__isnull", True)),
+                        fields=["method", "created_at"],
+                        name="dead_letter_pending_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.1.6 on 2026-10-19 17:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("notifications", "0005_dead_letters"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeliveryAttempt",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "method",
+                    models.CharField(
+                        choices=[
+                            ("SMS", "SMS"),
+                            ("EMAIL", "Email"),
+                            ("TELEGRAM", "Telegram"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "outcome",
+                    models.CharField(
+                        choices=[
+                            ("SENT", "Отправлено"),
+                            ("FAILED", "Отклонено провайдером"),
+                            ("ERROR", "Ошибка"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("latency_ms", models.PositiveIntegerField()),
+                (
+                    "provider_id",
+                    models.CharField(blank=True, default="", max_length=64),
+                ),
+                ("error", models.CharField(blank=True, default="", max_length=500)),
+                ("attempted_at", models.DateTimeField()),
+                (
+                    "outbox_message",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="attempts",
+                        to="notifications.outboxmessage",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["id"],
+            },
+        ),
+    ]
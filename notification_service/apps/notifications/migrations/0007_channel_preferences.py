@@ -0,0 +1,48 @@
+# Generated by Django 5.1.6 on 2026-10-19 17:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("notifications", "0006_delivery_attempts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="notification_type",
+            field=models.CharField(blank=True, default="", max_length=50),
+        ),
+        migrations.CreateModel(
+            name="ChannelPreference",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("user_id", models.IntegerField()),
+                (
+                    "notification_type",
+                    models.CharField(blank=True, default="", max_length=50),
+                ),
+                ("channels", models.JSONField()),
+            ],
+            options={
+                "ordering": ["user_id", "notification_type"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user_id", "notification_type"),
+                        name="channel_preference_unique",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.1.6 on 2026-10-19 17:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("notifications", "0007_channel_preferences"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeliveryStatsBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("bucket", models.DateTimeField()),
+                (
+                    "method",
+                    models.CharField(
+                        choices=[
+                            ("SMS", "SMS"),
+                            ("EMAIL", "Email"),
+                            ("TELEGRAM", "Telegram"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("sent", models.PositiveIntegerField(default=0)),
+                ("retried", models.PositiveIntegerField(default=0)),
+                ("failed", models.PositiveIntegerField(default=0)),
+                ("fallbacks", models.PositiveIntegerField(default=0)),
+                ("dead_lettered", models.PositiveIntegerField(default=0)),
+                ("latency_ms_total", models.BigIntegerField(default=0)),
+                ("latency_ms_max", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "ordering": ["bucket", "method"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("bucket", "method"), name="delivery_stats_bucket_unique"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -1,4 +1,6 @@
+from datetime import datetime, timedelta
 from typing import Optional
+from zoneinfo import ZoneInfo
 
 from django.db import models
 from django.utils import timezone
@@ -9,6 +11,7 @@ class OutboxStatus(models.TextChoices):
     ENQUEUED = "ENQUEUED", "В очереди"
     SENT = "SENT", "Отправлено"
     FAILED = "FAILED", "Не удалось"
+    SCHEDULED = "SCHEDULED", "Запланировано"
 
 
 class NotificationMethod(models.TextChoices):
@@ -17,6 +20,14 @@ class NotificationMethod(models.TextChoices):
     TELEGRAM = "TELEGRAM", "Telegram"
 
 
+# Цепочка fallback-а по умолчанию
+FALLBACK_ORDER = [
+    NotificationMethod.SMS,
+    NotificationMethod.TELEGRAM,
+    NotificationMethod.EMAIL,
+]
+
+
 class BaseModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -30,6 +41,11 @@ class Notification(BaseModel):
     title = models.CharField(max_length=200)
     message = models.TextField()
     is_sent = models.BooleanField(default=False)
+    # Каналы доставки по порядку и нормализованные адреса в них ({method: address})
+    channels = models.JSONField(default=list)
+    recipients = models.JSONField(default=dict)
+    send_at = models.DateTimeField(null=True, blank=True)
+    notification_type = models.CharField(max_length=50, blank=True, default="")
 
     def __str__(self):
         return f"{self.title} (user: {self.user_id})"
@@ -44,13 +60,26 @@ class OutboxMessage(BaseModel):
         max_length=20, choices=OutboxStatus.choices, default=OutboxStatus.PENDING
     )
     payload = models.JSONField()
+    recipient = models.CharField(max_length=255, blank=True, default="")
     attempt_count = models.IntegerField(default=0)
     max_retries = models.IntegerField(default=3)
     last_attempt = models.DateTimeField(null=True, blank=True)
     status_changed_at = models.DateTimeField(default=timezone.now)
+    shard = models.PositiveSmallIntegerField(default=0)
+    # Для SCHEDULED: момент, когда сообщение вернется в PENDING
+    release_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "shard"], name="outbox_status_shard_idx"),
+            models.Index(
+                fields=["release_at"],
+                name="outbox_release_at_idx",
+                condition=models.Q(status=OutboxStatus.SCHEDULED),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.method} - {self.status} (attempts: {self.attempt_count})"
@@ -61,20 +90,58 @@ class OutboxMessage(BaseModel):
     def start_processing(self):
         self.attempt_count += 1
         self.last_attempt = timezone.now()
-        self.save()
+        self.save(update_fields=["attempt_count", "last_attempt", "updated_at"])
 
     def mark_success(self):
         self.status = OutboxStatus.SENT
         self.status_changed_at = timezone.now()
-        self.save()
+        self.save(update_fields=["status", "status_changed_at", "updated_at"])
 
     def mark_failed(self, reason=""):
         self.status = OutboxStatus.FAILED
         self.status_changed_at = timezone.now()
-        self.save()
+        self.last_error = reason
+        self.save(
+            update_fields=["status", "status_changed_at", "last_error", "updated_at"]
+        )
+
+    def schedule_retry(self, reason, delay):
+        """Повтор через delay секунд через очередь запланированных сообщений"""
+        self.status = OutboxStatus.SCHEDULED
+        self.status_changed_at = timezone.now()
+        self.release_at = self.status_changed_at + timedelta(seconds=delay)
+        self.last_error = reason
+        self.save(
+            update_fields=[
+                "status",
+                "status_changed_at",
+                "release_at",
+                "last_error",
+                "updated_at",
+            ]
+        )
+
+    def move_to_dead_letter(self):
+        return DeadLetter.objects.create(
+            outbox_message=self,
+            notification_id=self.notification_id,
+            method=self.method,
+            reason=self.last_error,
+            attempt_count=self.attempt_count,
+        )
 
     def get_next_fallback_method(self) -> Optional[str]:
-        methods = ["SMS", "TELEGRAM", "EMAIL"]
+        methods = self.notification.channels
+        if not methods:
+            # Уведомления, созданные до хранения цепочки каналов
+            from apps.notifications.routing import routing_table
+
+            methods = (
+                routing_table().channels_for(
+                    self.notification.user_id, self.notification.notification_type
+                )
+                or FALLBACK_ORDER
+            )
         try:
             current_index = methods.index(self.method)
             if current_index + 1 < len(methods):
@@ -86,10 +153,175 @@ class OutboxMessage(BaseModel):
     def create_fallback(self):
         next_method = self.get_next_fallback_method()
         if next_method and not self.notification.is_sent:
-            return OutboxMessage.objects.create(
-                notification=self.notification,
-                method=next_method,
-                status=OutboxStatus.PENDING,
-                payload=self.payload,
+            from apps.notifications.services import NotificationService
+
+            service = NotificationService()
+            # Во время окна тишины получателя fallback ждет его окончания
+            fallback = service.build_outbox_message(
+                self.notification,
+                next_method,
+                release_at=service.scheduler.release_at(self.notification.user_id),
             )
+            fallback.save()
+            return fallback
         return None
+
+
+class AttemptOutcome(models.TextChoices):
+    SENT = "SENT", "Отправлено"
+    FAILED = "FAILED", "Отклонено провайдером"
+    ERROR = "ERROR", "Ошибка"
+
+
+class DeliveryAttempt(models.Model):
+    """Одна попытка отправки outbox-сообщения; пишется пачками (attempts.py)"""
+
+    outbox_message = models.ForeignKey(
+        OutboxMessage, on_delete=models.CASCADE, related_name="attempts"
+    )
+    method = models.CharField(max_length=20, choices=NotificationMethod.choices)
+    outcome = models.CharField(max_length=10, choices=AttemptOutcome.choices)
+    latency_ms = models.PositiveIntegerField()
+    provider_id = models.CharField(max_length=64, blank=True, default="")
+    error = models.CharField(max_length=500, blank=True, default="")
+    attempted_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self):
+        return f"{self.method} - {self.outcome} ({self.latency_ms} ms)"
+
+
+class DeliveryStatsBucket(models.Model):
+    """Счетчики доставки канала за минуту; обновляются инкрементально пачками (stats.py)"""
+
+    bucket = models.DateTimeField()
+    method = models.CharField(max_length=20, choices=NotificationMethod.choices)
+    attempts = models.PositiveIntegerField(default=0)
+    sent = models.PositiveIntegerField(default=0)
+    retried = models.PositiveIntegerField(default=0)
+    # Окончательные отказы канала, в том числе перешедшие в fallback
+    failed = models.PositiveIntegerField(default=0)
+    fallbacks = models.PositiveIntegerField(default=0)
+    dead_lettered = models.PositiveIntegerField(default=0)
+    latency_ms_total = models.BigIntegerField(default=0)
+    latency_ms_max = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["bucket", "method"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["bucket", "method"], name="delivery_stats_bucket_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.bucket:%Y-%m-%d %H:%M} {self.method}: {self.sent}/{self.attempts}"
+        )
+
+
+class DeadLetter(BaseModel):
+    """Сообщение, для которого исчерпаны повторы и каналы fallback-а"""
+
+    outbox_message = models.OneToOneField(
+        OutboxMessage, on_delete=models.CASCADE, related_name="dead_letter"
+    )
+    notification = models.ForeignKey(
+        Notification, on_delete=models.CASCADE, related_name="dead_letters"
+    )
+    method = models.CharField(max_length=20, choices=NotificationMethod.choices)
+    reason = models.TextField(blank=True, default="")
+    attempt_count = models.IntegerField(default=0)
+    replayed_at = models.DateTimeField(null=True, blank=True)
+    replay_method = models.CharField(
+        max_length=20, choices=NotificationMethod.choices, blank=True, default=""
+    )
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(
+                fields=["method", "created_at"],
+                name="dead_letter_pending_idx",
+                condition=models.Q(replayed_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.method} - {self.reason} (notification: {self.notification_id})"
+
+
+class ChannelPreference(BaseModel):
+    """Порядок каналов получателя; пустой notification_type — для всех типов"""
+
+    user_id = models.IntegerField()
+    notification_type = models.CharField(max_length=50, blank=True, default="")
+    channels = models.JSONField()
+
+    class Meta:
+        ordering = ["user_id", "notification_type"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user_id", "notification_type"],
+                name="channel_preference_unique",
+            ),
+        ]
+
+    def __str__(self):
+        channels = " -> ".join(self.channels)
+        return f"{channels} ({self.notification_type or '*'}, user: {self.user_id})"
+
+
+class OutboxClaimer(models.Model):
+    """Живой процесс-claimer, продлевающий своё членство heartbeat-ом"""
+
+    name = models.CharField(max_length=100, unique=True)
+    heartbeat_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.name} (heartbeat: {self.heartbeat_at})"
+
+
+class OutboxShardLease(models.Model):
+    """Аренда шарда outbox конкретным claimer-ом"""
+
+    shard = models.PositiveSmallIntegerField(unique=True)
+    owner = models.CharField(max_length=100, blank=True, default="")
+    expires_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["shard"]
+
+    def __str__(self):
+        return f"shard {self.shard} -> {self.owner or '-'}"
+
+
+class QuietHours(BaseModel):
+    """Окно тишины получателя в его часовом поясе; может переходить через полночь"""
+
+    user_id = models.IntegerField(unique=True)
+    start = models.TimeField()
+    end = models.TimeField()
+    timezone = models.CharField(max_length=64, default="UTC")
+
+    class Meta:
+        ordering = ["user_id"]
+
+    def __str__(self):
+        return f"{self.start}-{self.end} {self.timezone} (user: {self.user_id})"
+
+    def contains(self, moment):
+        local = moment.astimezone(ZoneInfo(self.timezone)).time()
+        if self.start <= self.end:
+            return self.start <= local < self.end
+        return local >= self.start or local < self.end
+
+    def window_end(self, moment):
+        """Ближайший после moment конец окна тишины"""
+        local = moment.astimezone(ZoneInfo(self.timezone))
+        end = datetime.combine(local.date(), self.end, tzinfo=local.tzinfo)
+        if end <= local:
+            end += timedelta(days=1)
+        return end
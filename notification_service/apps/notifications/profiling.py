@@ -0,0 +1,128 @@
+import logging
+import time
+from contextlib import ExitStack
+from functools import partial
+
+from celery.signals import task_postrun, task_prerun
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Допустимое число SQL-запросов на горячих путях (без SAVEPOINT-ов)
+PERF_BUDGETS = {
+    "create_notification": 3,
+    "process_pending_outbox_messages": 2,
+    "process_single_outbox_message": 5,
+}
+
+TRANSACTION_CONTROL = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+class QueryProfiler:
+    """Считает SQL-запросы, их суммарное время и wall time блока кода.
+
+    По умолчанию учитываются все базы из DATABASES (primary и реплика), по
+    каждой отдельно ведется счетчик в sql_by_alias. SAVEPOINT-ы не
+    учитываются: их число зависит от внешней транзакции (тесты, вложенные
+    atomic), а не от самого горячего пути.
+    """
+
+    def __init__(self, using=None):
+        self.aliases = list(connections) if using is None else [using]
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.wall_time = 0.0
+        self.queries = []
+        self.sql_by_alias = dict.fromkeys(self.aliases, 0)
+
+    def __enter__(self):
+        self._wrappers = ExitStack()
+        for alias in self.aliases:
+            self._wrappers.enter_context(
+                connections[alias].execute_wrapper(partial(self._record, alias))
+            )
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.wall_time = time.perf_counter() - self._started
+        self._wrappers.__exit__(exc_type, exc_value, traceback)
+
+    def as_dict(self):
+        return {
+            "sql_count": self.sql_count,
+            "sql_by_alias": self.sql_by_alias,
+            "sql_time_ms": round(self.sql_time * 1000, 2),
+            "wall_ms": round(self.wall_time * 1000, 2),
+        }
+
+    def _record(self, alias, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if not sql.lstrip().upper().startswith(TRANSACTION_CONTROL):
+                self.sql_count += 1
+                self.sql_by_alias[alias] += 1
+                self.sql_time += time.perf_counter() - started
+                self.queries.append(sql)
+
+
+def report(name, profiler, **fields):
+    """Пишет замер в лог; при превышении бюджета — warning"""
+    budget = PERF_BUDGETS.get(name)
+    over_budget = budget is not None and profiler.sql_count > budget
+    logger.log(
+        logging.WARNING if over_budget else logging.INFO,
+        "Профиль горячего пути",
+        extra={
+            "event": "perf",
+            "hot_path": name,
+            "sql_budget": budget,
+            **profiler.as_dict(),
+            **fields,
+        },
+    )
+
+
+class QueryProfilingMiddleware:
+    """Профилирует каждый HTTP-запрос при PERF_PROFILING=True"""
+
+    def __init__(self, get_response):
+        if not settings.PERF_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryProfiler() as profiler:
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        name = f"{request.method} {match.route if match else request.path}"
+        report(name, profiler, status_code=response.status_code)
+        return response
+
+
+_task_profilers = {}
+
+
+def _start_task_profiler(task_id=None, **kwargs):
+    profiler = QueryProfiler()
+    profiler.__enter__()
+    _task_profilers[task_id] = profiler
+
+
+def _finish_task_profiler(task_id=None, task=None, state=None, **kwargs):
+    profiler = _task_profilers.pop(task_id, None)
+    if profiler is None:
+        return
+    profiler.__exit__(None, None, None)
+    report(task.name.rsplit(".", 1)[-1], profiler, task_id=task_id, state=state)
+
+
+def connect_task_signals():
+    """Профилирует каждую Celery-задачу через task_prerun/task_postrun"""
+    task_prerun.connect(_start_task_profiler, weak=False)
+    task_postrun.connect(_finish_task_profiler, weak=False)
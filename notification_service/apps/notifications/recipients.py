@@ -0,0 +1,94 @@
+import re
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+
+from apps.notifications.models import NotificationMethod
+
+NON_DIGITS = re.compile(r"\D+")
+EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+CHAT_ID = re.compile(r"^(-?\d+|@[A-Za-z][A-Za-z0-9_]{4,})$")
+
+# Поле в данных пользователя, из которого берется адрес для канала
+USER_DATA_FIELDS = {
+    NotificationMethod.SMS: "phone",
+    NotificationMethod.EMAIL: "email",
+    NotificationMethod.TELEGRAM: "telegram_chat_id",
+}
+
+
+class UndeliverableNotification(Exception):
+    """Ни в одном из запрошенных каналов у получателя нет корректного адреса"""
+
+
+def normalize_phone(value) -> Optional[str]:
+    digits = NON_DIGITS.sub("", str(value))
+
+    # 8 — российский префикс междугородней связи: и мобильные, и городские номера
+    if len(digits) == 11 and digits[0] == "8":
+        digits = "7" + digits[1:]
+    if len(digits) == 11 and digits[0] == "7":
+        return "+" + digits
+    if 10 <= len(digits) <= 15 and str(value).lstrip().startswith("+"):
+        return "+" + digits
+    return None
+
+
+def normalize_email(value) -> Optional[str]:
+    value = str(value).strip()
+    if not EMAIL.match(value):
+        return None
+    local, _, domain = value.rpartition("@")
+    return f"{local}@{domain.lower()}"
+
+
+def normalize_chat_id(value) -> Optional[str]:
+    value = str(value).strip()
+    return value if CHAT_ID.match(value) else None
+
+
+NORMALIZERS = {
+    NotificationMethod.SMS: normalize_phone,
+    NotificationMethod.EMAIL: normalize_email,
+    NotificationMethod.TELEGRAM: normalize_chat_id,
+}
+
+
+class RecipientNormalizer:
+    """Нормализация и валидация адресов получателей при приеме уведомления.
+
+    Адрес считается один раз и сохраняется в уведомлении и outbox-сообщении,
+    воркеры используют его как есть.
+    """
+
+    def normalize(self, method: str, value) -> Optional[str]:
+        if value in (None, ""):
+            return None
+        return NORMALIZERS[method](value)
+
+    def normalize_many(self, method: str, values: Iterable) -> List[Optional[str]]:
+        """Пакетная нормализация списка адресов одного канала (для рассылок)"""
+        normalizer = NORMALIZERS[method]
+        return [None if value in (None, "") else normalizer(value) for value in values]
+
+    def address(self, method: str, user_data: dict) -> Optional[str]:
+        """Нормализованный адрес пользователя в канале или None"""
+        value = user_data.get(USER_DATA_FIELDS[method])
+        if method == NotificationMethod.TELEGRAM and settings.CHAT_ID:
+            # CHAT_ID из окружения, как и раньше, перекрывает чат пользователя
+            value = settings.CHAT_ID
+        return self.normalize(method, value)
+
+    def resolve(self, user_data: dict, channels: List[str]) -> Dict[str, str]:
+        """Адреса получателя в каналах цепочки; каналы без корректного адреса пропускаются"""
+        recipients = {}
+        for method in channels:
+            address = self.address(method, user_data)
+            if address:
+                recipients[method] = address
+
+        if not recipients:
+            raise UndeliverableNotification(
+                f"Нет корректного адреса получателя ни в одном канале: {', '.join(channels)}"
+            )
+        return recipients
@@ -0,0 +1,129 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.notifications.models import ChannelPreference
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "notifications:routing:{user_id}:version"
+
+
+class UserRoutes:
+    """Скомпилированные предпочтения получателя: {notification_type: [каналы]}"""
+
+    def __init__(self, routes, version):
+        self.routes = routes
+        self.version = version
+        self.checked_at = time.monotonic()
+
+    def channels_for(self, notification_type=""):
+        """Цепочка каналов для типа уведомления, иначе общая цепочка получателя"""
+        return self.routes.get(notification_type) or self.routes.get("")
+
+
+class RoutingTableCache:
+    """Держит предпочтения получателей в памяти процесса.
+
+    Предпочтения загружаются лениво, одним запросом на получателя. Версия
+    предпочтений получателя лежит в общем кэше Django и увеличивается при их
+    изменении; процесс сверяет ее не чаще раза в ROUTING_TABLE_CHECK_SECONDS и
+    перечитывает только этого получателя. Между проверками запросов нет вовсе.
+    В памяти хранится не больше ROUTING_TABLE_MAX_USERS получателей (LRU).
+    """
+
+    def __init__(self):
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    def channels_for(self, user_id, notification_type=""):
+        return self._get(user_id).channels_for(notification_type)
+
+    def _get(self, user_id):
+        entry = self._users.get(user_id)
+        if (
+            entry is not None
+            and time.monotonic() - entry.checked_at
+            < settings.ROUTING_TABLE_CHECK_SECONDS
+        ):
+            return entry
+
+        version = self._remote_version(user_id, entry)
+        if entry is None or entry.version != version:
+            entry = self._load(user_id, version)
+        else:
+            entry.checked_at = time.monotonic()
+
+        with self._lock:
+            self._users[user_id] = entry
+            self._users.move_to_end(user_id)
+            while len(self._users) > settings.ROUTING_TABLE_MAX_USERS:
+                self._users.popitem(last=False)
+        return entry
+
+    def invalidate(self, user_id):
+        """Сбрасывает предпочтения получателя в этом процессе и версию для остальных"""
+        key = VERSION_KEY.format(user_id=user_id)
+        try:
+            if not cache.add(key, 1, timeout=None):
+                cache.incr(key)
+        except Exception:
+            logger.exception(
+                "Не удалось обновить версию предпочтений получателя",
+                extra={"event": "routing_table_error", "user_id": user_id},
+            )
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def _remote_version(self, user_id, entry):
+        try:
+            return cache.get(VERSION_KEY.format(user_id=user_id), 0)
+        except Exception:
+            # Без общего кэша продолжаем со старыми данными до следующей проверки
+            logger.exception(
+                "Не удалось прочитать версию предпочтений получателя",
+                extra={"event": "routing_table_error", "user_id": user_id},
+            )
+            return entry.version if entry is not None else 0
+
+    def _load(self, user_id, version):
+        rows = ChannelPreference.objects.filter(user_id=user_id).order_by()
+        routes = dict(rows.values_list("notification_type", "channels"))
+        logger.debug(
+            "Предпочтения получателя загружены",
+            extra={
+                "event": "routing_table_loaded",
+                "user_id": user_id,
+                "routes": len(routes),
+                "version": version,
+            },
+        )
+        return UserRoutes(routes, version)
+
+
+_cache = RoutingTableCache()
+
+
+def routing_table():
+    return _cache
+
+
+def invalidate_routing_table(*user_ids):
+    """Для массовых изменений через QuerySet.update(), которые не шлют сигналов"""
+    # После коммита: иначе соседний процесс перечитает предпочтения по старым данным
+    for user_id in set(user_ids):
+        transaction.on_commit(partial(_cache.invalidate, user_id))
+
+
+@receiver(post_save, sender=ChannelPreference)
+@receiver(post_delete, sender=ChannelPreference)
+def _invalidate_on_change(sender, instance, **kwargs):
+    invalidate_routing_table(instance.user_id)
@@ -0,0 +1,40 @@
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from apps.notifications.models import QuietHours
+
+
+class DeliveryScheduler:
+    """Считает момент выпуска сообщения с учетом send_at и окна тишины получателя.
+
+    К моменту выпуска добавляется случайный сдвиг, чтобы сообщения,
+    запланированные на одно время (ровный час, конец окна тишины), выходили
+    равномерно, а не одной волной.
+    """
+
+    def quiet_hours_by_user(self, user_ids):
+        """Окна тишины пачки получателей одним запросом: {user_id: QuietHours}"""
+        return {
+            quiet_hours.user_id: quiet_hours
+            for quiet_hours in QuietHours.objects.filter(user_id__in=set(user_ids))
+        }
+
+    def release_at(self, user_id, send_at=None, now=None, quiet_hours=None):
+        """quiet_hours — результат quiet_hours_by_user; без него окно читается из БД"""
+        now = now or timezone.now()
+        due = max(send_at or now, now)
+        spread = settings.SCHEDULE_JITTER_SECONDS if due > now else 0
+
+        if quiet_hours is None:
+            quiet_hours = self.quiet_hours_by_user([user_id])
+        quiet_hours = quiet_hours.get(user_id)
+        if quiet_hours and quiet_hours.contains(due):
+            due = quiet_hours.window_end(due)
+            spread = settings.QUIET_HOURS_SPREAD_SECONDS
+
+        if due <= now:
+            return None
+        return due + timedelta(seconds=random.uniform(0, spread))
@@ -1,28 +1,82 @@
+from datetime import timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import serializers
 
-from apps.notifications.models import Notification, NotificationMethod, OutboxMessage
+from apps.notifications.models import (
+    ChannelPreference,
+    DeadLetter,
+    DeliveryAttempt,
+    Notification,
+    NotificationMethod,
+    OutboxMessage,
+    QuietHours,
+)
+
+# Не больше ~10 тысяч минутных бакетов на канал в одном ответе
+MAX_STATS_RANGE = {
+    "minute": timedelta(days=7),
+    "hour": timedelta(days=90),
+    "day": timedelta(days=3650),
+}
 
 
 class CreateNotificationSerializer(serializers.ModelSerializer):
+    # Без delivery_methods каналы берутся из предпочтений получателя
     delivery_methods = serializers.ListField(
         child=serializers.ChoiceField(choices=NotificationMethod.choices),
-        default=[NotificationMethod.SMS],
         required=False,
     )
 
     class Meta:
         model = Notification
-        fields = ["user_id", "title", "message", "delivery_methods"]
+        fields = [
+            "user_id",
+            "title",
+            "message",
+            "delivery_methods",
+            "send_at",
+            "notification_type",
+        ]
 
 
 class NotificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Notification
-        fields = ["id", "user_id", "title", "message", "is_sent", "created_at"]
-        read_only_fields = ["id", "is_sent", "created_at"]
+        fields = [
+            "id",
+            "user_id",
+            "title",
+            "message",
+            "is_sent",
+            "send_at",
+            "notification_type",
+            "channels",
+            "created_at",
+        ]
+        # send_at задается при создании: outbox-сообщение уже запланировано по нему
+        read_only_fields = ["id", "is_sent", "send_at", "channels", "created_at"]
+
+
+class DeliveryAttemptSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DeliveryAttempt
+        fields = [
+            "id",
+            "outcome",
+            "latency_ms",
+            "provider_id",
+            "error",
+            "attempted_at",
+        ]
+        read_only_fields = fields
 
 
 class OutboxMessageSerializer(serializers.ModelSerializer):
+    attempts = DeliveryAttemptSerializer(many=True, read_only=True)
+
     class Meta:
         model = OutboxMessage
         fields = [
@@ -31,6 +85,123 @@ class OutboxMessageSerializer(serializers.ModelSerializer):
             "status",
             "attempt_count",
             "last_attempt",
+            "last_error",
+            "release_at",
+            "created_at",
+            "attempts",
+        ]
+        read_only_fields = fields
+
+
+class DeadLetterSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DeadLetter
+        fields = [
+            "id",
+            "outbox_message",
+            "notification",
+            "method",
+            "reason",
+            "attempt_count",
+            "replayed_at",
+            "replay_method",
             "created_at",
         ]
         read_only_fields = fields
+
+
+class DeadLetterReplaySerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, max_length=10000
+    )
+    method = serializers.ChoiceField(choices=NotificationMethod.choices, required=False)
+    reason_contains = serializers.CharField(required=False)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+    limit = serializers.IntegerField(min_value=1, required=False)
+    to_method = serializers.ChoiceField(
+        choices=NotificationMethod.choices, required=False
+    )
+    rate = serializers.FloatField(min_value=0.1, required=False)
+
+    FILTER_FIELDS = (
+        "ids",
+        "method",
+        "reason_contains",
+        "created_after",
+        "created_before",
+        "limit",
+    )
+
+    def validate_rate(self, value):
+        if value > settings.DEAD_LETTER_REPLAY_MAX_RATE:
+            raise serializers.ValidationError(
+                "Не больше DEAD_LETTER_REPLAY_MAX_RATE "
+                f"({settings.DEAD_LETTER_REPLAY_MAX_RATE:g}) в секунду."
+            )
+        return value
+
+    def filters(self):
+        """Аргументы select_dead_letters в виде, пригодном для JSON-сообщения Celery"""
+        return {
+            name: self.data[name]
+            for name in self.FILTER_FIELDS
+            if name in self.validated_data
+        }
+
+
+class DeliveryStatsQuerySerializer(serializers.Serializer):
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+    interval = serializers.ChoiceField(
+        choices=["minute", "hour", "day"], default="minute"
+    )
+    method = serializers.ChoiceField(choices=NotificationMethod.choices, required=False)
+
+    def validate(self, attrs):
+        until = attrs.setdefault("until", timezone.now())
+        since = attrs.setdefault("since", until - timedelta(hours=1))
+        if since >= until:
+            raise serializers.ValidationError({"since": "Должно быть раньше until."})
+        max_range = MAX_STATS_RANGE[attrs["interval"]]
+        if until - since > max_range:
+            message = f"Диапазон не больше {max_range.days} дн. для этого interval."
+            raise serializers.ValidationError({"since": message})
+        return attrs
+
+
+class RecipientValidationSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=NotificationMethod.choices)
+    recipients = serializers.ListField(
+        child=serializers.CharField(allow_blank=True, trim_whitespace=False),
+        max_length=10000,
+    )
+
+
+class ChannelPreferenceSerializer(serializers.ModelSerializer):
+    channels = serializers.ListField(
+        child=serializers.ChoiceField(choices=NotificationMethod.choices),
+        min_length=1,
+    )
+
+    class Meta:
+        model = ChannelPreference
+        fields = ["id", "user_id", "notification_type", "channels"]
+
+    def validate_channels(self, value):
+        if len(set(value)) != len(value):
+            raise serializers.ValidationError("Каналы не должны повторяться.")
+        return value
+
+
+class QuietHoursSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = QuietHours
+        fields = ["user_id", "start", "end", "timezone"]
+
+    def validate_timezone(self, value):
+        try:
+            ZoneInfo(value)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise serializers.ValidationError("Неизвестный часовой пояс.")
+        return value
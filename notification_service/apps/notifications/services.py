@@ -1,41 +1,131 @@
+from datetime import datetime
 from typing import List, Optional
 
 from django.db import transaction
 
-from .models import Notification, OutboxMessage, NotificationMethod
+from .buffer import IngestBuffer, allocate_notification_id
+from .models import FALLBACK_ORDER, Notification, OutboxMessage, OutboxStatus, NotificationMethod
+from .recipients import RecipientNormalizer
+from .routing import routing_table
+from .scheduling import DeliveryScheduler
+from .sharding import shard_for
 
 
 class NotificationService:
+    def __init__(self):
+        self.normalizer = RecipientNormalizer()
+        self.scheduler = DeliveryScheduler()
+
     @transaction.atomic
-    def create_notification(self, user_id: int, title: str, message: str, methods: Optional[List[str]] = None):
-        if not methods:
-            methods = [NotificationMethod.SMS]
+    def create_notification(
+        self,
+        user_id: int,
+        title: str,
+        message: str,
+        methods: Optional[List[str]] = None,
+        send_at: Optional[datetime] = None,
+        notification_type: str = "",
+    ):
+        channels, recipients = self.resolve_delivery(user_id, methods, notification_type)
+        release_at = self.scheduler.release_at(user_id, send_at)
 
         notification = Notification.objects.create(
             user_id=user_id,
             title=title,
-            message=message
+            message=message,
+            channels=channels,
+            recipients=recipients,
+            send_at=send_at,
+            notification_type=notification_type,
         )
 
-        user_data = {
-            1: {"email": "test1@mail.ru", "phone": "+79001234567", "telegram_chat_id": "123456789"},
-            2: {"email": "test2@mail.ru", "phone": "+79007654321", "telegram_chat_id": "987654321"},
-        }.get(user_id, {})
+        self.build_outbox_message(notification, release_at=release_at).save()
+
+        return notification
+
+    def enqueue_notification(
+        self,
+        user_id: int,
+        title: str,
+        message: str,
+        methods: Optional[List[str]] = None,
+        send_at: Optional[datetime] = None,
+        notification_type: str = "",
+    ):
+        """Буферизованный прием: id выдается сразу, запись в БД делает flush_ingest_buffer.
+
+        Окна тишины здесь не читаются: release_at считает flusher, одним
+        запросом на пачку.
+        """
+        channels, recipients = self.resolve_delivery(user_id, methods, notification_type)
+        notification_id = allocate_notification_id()
+
+        IngestBuffer().append({
+            "id": notification_id,
+            "user_id": user_id,
+            "title": title,
+            "message": message,
+            "channels": channels,
+            "recipients": recipients,
+            "send_at": send_at and send_at.isoformat(),
+            "notification_type": notification_type,
+        })
 
-        OutboxMessage.objects.create(
+        return notification_id
+
+    def resolve_delivery(
+        self, user_id: int, methods: Optional[List[str]] = None, notification_type: str = ""
+    ):
+        """Цепочка каналов с корректными адресами и сами адреса; UndeliverableNotification, если таких нет"""
+        chain = self._get_chain(methods, user_id, notification_type)
+        recipients = self.normalizer.resolve(self._get_user_data(user_id), chain)
+        return list(recipients), recipients
+
+    def build_outbox_message(
+        self, notification: Notification, method: Optional[str] = None, release_at: Optional[datetime] = None
+    ):
+        method = method or notification.channels[0]
+        recipient = notification.recipients.get(method)
+        if recipient is None:
+            # Уведомления, созданные до хранения адресов
+            recipient = self.normalizer.address(method, self._get_user_data(notification.user_id))
+
+        return OutboxMessage(
             notification=notification,
-            method=methods[0],
-            payload=self._build_payload(methods[0], notification, user_data)
+            method=method,
+            payload=self._build_payload(method, notification, recipient),
+            recipient=recipient or "",
+            shard=shard_for(notification.id),
+            status=OutboxStatus.SCHEDULED if release_at else OutboxStatus.PENDING,
+            release_at=release_at,
         )
 
-        return notification
+    def _get_chain(
+        self, methods: Optional[List[str]] = None, user_id: Optional[int] = None, notification_type: str = ""
+    ):
+        """Без каналов — предпочтения получателя (или SMS); один канал — он и следующие
+        за ним по FALLBACK_ORDER; несколько — ровно они"""
+        if not methods:
+            preferred = routing_table().channels_for(user_id, notification_type)
+            if preferred:
+                return list(preferred)
+            methods = [NotificationMethod.SMS]
+        if len(methods) > 1:
+            return list(dict.fromkeys(methods))
+        return FALLBACK_ORDER[FALLBACK_ORDER.index(methods[0]):]
+
+    def _get_user_data(self, user_id: int):
+        return {
+            1: {"email": "test1@mail.ru", "phone": "+79001234567", "telegram_chat_id": "123456789"},
+            2: {"email": "test2@mail.ru", "phone": "+79007654321", "telegram_chat_id": "987654321"},
+        }.get(user_id, {})
 
-    def _build_payload(self, method: str, notification: Notification, user_data: dict):
+    def _build_payload(self, method: str, notification: Notification, recipient: Optional[str]):
         if method == NotificationMethod.EMAIL:
-            return {"to_email": user_data.get("email"), "subject": notification.title, "message": notification.message}
+            return {"to_email": recipient, "subject": notification.title, "message": notification.message}
         elif method == NotificationMethod.SMS:
-            return {"phone": user_data.get("phone"), "message": f"{notification.title}: {notification.message}"}
+            return {"phone": recipient, "message": f"{notification.title}: {notification.message}"}
         elif method == NotificationMethod.TELEGRAM:
-            return {"chat_id": user_data.get("telegram_chat_id"),
+            return {"chat_id": recipient,
                     "message": f"*{notification.title}*\n{notification.message}"}
         return {}
@@ -0,0 +1,156 @@
+import logging
+import math
+from typing import List
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.notifications.models import (
+    OutboxClaimer,
+    OutboxMessage,
+    OutboxShardLease,
+    OutboxStatus,
+)
+
+logger = logging.getLogger(__name__)
+
+# Сообщения, которые еще будут забраны claimer-ом
+UNSENT_STATUSES = (OutboxStatus.PENDING, OutboxStatus.ENQUEUED, OutboxStatus.SCHEDULED)
+
+
+def shard_for(notification_id: int) -> int:
+    """Шард outbox-сообщения: все попытки и fallback-и уведомления живут в одном шарде"""
+    return notification_id % settings.OUTBOX_SHARD_COUNT
+
+
+def reshard_outbox(shard_count=None, batch_size=1000):
+    """Пересчитывает shard неотправленных сообщений после смены OUTBOX_SHARD_COUNT.
+
+    Обновляет пачками по batch_size, чтобы не держать блокировки на всей
+    очереди, и удаляет аренды шардов, которых больше нет. Возвращает число
+    перенесенных сообщений.
+    """
+    shard_count = shard_count or settings.OUTBOX_SHARD_COUNT
+    queryset = (
+        OutboxMessage.objects.filter(status__in=UNSENT_STATUSES)
+        .alias(target=F("notification_id") % shard_count)
+        .exclude(shard=F("target"))
+    )
+
+    moved = 0
+    while True:
+        with transaction.atomic():
+            ids = list(
+                queryset.select_for_update(skip_locked=True)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            moved += OutboxMessage.objects.filter(id__in=ids).update(
+                shard=F("notification_id") % shard_count
+            )
+
+    OutboxShardLease.objects.filter(shard__gte=shard_count).delete()
+    logger.info(
+        "Outbox перешардирован",
+        extra={"event": "outbox_resharded", "count": moved, "shards": shard_count},
+    )
+    return moved
+
+
+class ShardLeaseManager:
+    """Распределяет шарды outbox между живыми claimer-процессами.
+
+    Каждый claimer периодически вызывает heartbeat(): продлевает своё членство,
+    отдаёт шарды сверх справедливой доли и забирает свободные или просроченные
+    аренды, в том числе оставшиеся от упавших соседей.
+    """
+
+    def __init__(self, owner: str, shard_count: int = None, lease_ttl: int = None):
+        self.owner = owner
+        self.shard_count = shard_count or settings.OUTBOX_SHARD_COUNT
+        self.lease_ttl = timezone.timedelta(
+            seconds=lease_ttl or settings.OUTBOX_SHARD_LEASE_TTL
+        )
+        self._leases_ready = False
+
+    def heartbeat(self) -> List[int]:
+        now = timezone.now()
+
+        with transaction.atomic():
+            OutboxClaimer.objects.update_or_create(
+                name=self.owner, defaults={"heartbeat_at": now}
+            )
+            self._ensure_leases(now)
+
+            alive = OutboxClaimer.objects.filter(
+                heartbeat_at__gt=now - self.lease_ttl
+            ).count()
+            target = math.ceil(self.shard_count / max(alive, 1))
+
+            owned = list(
+                OutboxShardLease.objects.select_for_update()
+                .filter(owner=self.owner, expires_at__gt=now)
+                .order_by("shard")
+                .values_list("shard", flat=True)
+            )
+
+            if len(owned) > target:
+                OutboxShardLease.objects.filter(
+                    owner=self.owner, shard__in=owned[target:]
+                ).update(owner="", expires_at=now)
+                owned = owned[:target]
+            elif len(owned) < target:
+                owned += list(
+                    OutboxShardLease.objects.select_for_update(skip_locked=True)
+                    .filter(Q(owner="") | Q(expires_at__lte=now))
+                    .filter(shard__lt=self.shard_count)
+                    .order_by("shard")
+                    .values_list("shard", flat=True)[: target - len(owned)]
+                )
+
+            OutboxShardLease.objects.filter(shard__in=owned).update(
+                owner=self.owner, expires_at=now + self.lease_ttl
+            )
+
+        return sorted(owned)
+
+    def release(self):
+        """Отдает все шарды и снимает членство при штатной остановке"""
+        with transaction.atomic():
+            OutboxShardLease.objects.filter(owner=self.owner).update(
+                owner="", expires_at=timezone.now()
+            )
+            OutboxClaimer.objects.filter(name=self.owner).delete()
+
+        logger.info("Claimer освободил шарды", extra={"owner": self.owner})
+
+    def _ensure_leases(self, now):
+        if self._leases_ready:
+            return
+
+        # Аренды покрывают только shard < shard_count: после уменьшения
+        # OUTBOX_SHARD_COUNT сообщения из старших шардов никто бы не забрал
+        if OutboxMessage.objects.filter(
+            status__in=UNSENT_STATUSES, shard__gte=self.shard_count
+        ).exists():
+            raise ImproperlyConfigured(
+                f"Есть неотправленные сообщения в шардах >= {self.shard_count}: "
+                "выполните python manage.py reshard_outbox"
+            )
+
+        OutboxShardLease.objects.bulk_create(
+            [
+                OutboxShardLease(shard=shard, expires_at=now)
+                for shard in range(self.shard_count)
+            ],
+            ignore_conflicts=True,
+        )
+        OutboxClaimer.objects.filter(
+            heartbeat_at__lte=now - self.lease_ttl * 10
+        ).delete()
+        self._leases_ready = True
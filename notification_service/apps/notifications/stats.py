@@ -0,0 +1,86 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import F, Max, Sum
+from django.db.models.functions import Greatest, Trunc
+
+from apps.notifications.models import DeliveryAttempt, DeliveryStatsBucket
+
+COUNTERS = ("attempts", "sent", "retried", "failed", "fallbacks", "dead_lettered")
+TRANSITIONS = frozenset(COUNTERS) - {"attempts"}
+
+
+def minute(moment):
+    return moment.replace(second=0, microsecond=0)
+
+
+class StatsRollup:
+    """Сводит пачку событий доставки в приращения DeliveryStatsBucket.
+
+    На каждую пару (минута, канал) в пачке — один UPDATE с F()-инкрементами,
+    сколько бы сообщений за ней ни стояло.
+    """
+
+    def __init__(self):
+        self.counters = defaultdict(Counter)
+        self.latency_max = defaultdict(int)
+
+    def add_attempt(self, attempt: DeliveryAttempt):
+        key = (minute(attempt.attempted_at), attempt.method)
+        self.counters[key]["attempts"] += 1
+        self.counters[key]["latency_ms_total"] += attempt.latency_ms
+        self.latency_max[key] = max(self.latency_max[key], attempt.latency_ms)
+
+    def add_transition(self, method, transition, moment):
+        self.counters[(minute(moment), method)][transition] += 1
+
+    def apply(self):
+        # Фиксированный порядок ключей: параллельные воркеры не ловят deadlock
+        with transaction.atomic():
+            for bucket, method in sorted(self.counters):
+                counters = self.counters[(bucket, method)]
+                DeliveryStatsBucket.objects.get_or_create(bucket=bucket, method=method)
+                DeliveryStatsBucket.objects.filter(bucket=bucket, method=method).update(
+                    latency_ms_max=Greatest(
+                        F("latency_ms_max"), self.latency_max[(bucket, method)]
+                    ),
+                    **{name: F(name) + value for name, value in counters.items()},
+                )
+
+
+def bucket_stats(since, until, interval="minute", method=None):
+    """Счетчики по интервалам [since, until); стоимость зависит от диапазона, не от истории"""
+    queryset = DeliveryStatsBucket.objects.filter(bucket__gte=since, bucket__lt=until)
+    if method:
+        queryset = queryset.filter(method=method)
+
+    rows = (
+        queryset.annotate(period=Trunc("bucket", interval))
+        .values("period", "method")
+        .annotate(
+            **{name: Sum(name) for name in COUNTERS},
+            latency_ms_total=Sum("latency_ms_total"),
+            latency_ms_max=Max("latency_ms_max"),
+        )
+        .order_by("period", "method")
+    )
+
+    return [
+        {
+            "bucket": row["period"],
+            "method": row["method"],
+            **{name: row[name] for name in COUNTERS},
+            "avg_latency_ms": (
+                round(row["latency_ms_total"] / row["attempts"], 1)
+                if row["attempts"]
+                else None
+            ),
+            "max_latency_ms": row["latency_ms_max"],
+            "fallback_rate": (
+                round(row["fallbacks"] / (row["sent"] + row["failed"]), 4)
+                if row["sent"] + row["failed"]
+                else None
+            ),
+        }
+        for row in rows
+    ]
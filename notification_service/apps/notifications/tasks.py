@@ -1,52 +1,129 @@
 import logging
+import time
 
 from celery import shared_task
+from django.conf import settings
 from django.db import transaction
 from django.db.models import Q
 from django.utils import timezone
 
-from apps.notifications.gateways import DeliveryService
-from apps.notifications.models import OutboxMessage, OutboxStatus
+from apps.notifications.attempts import recorder
+from apps.notifications.dead_letters import DeadLetterReplayer, select_dead_letters
+from apps.notifications.gateways import DeliveryResult, DeliveryService
+from apps.notifications.models import AttemptOutcome, OutboxMessage, OutboxStatus
+from apps.notifications.scheduling import DeliveryScheduler
 
 logger = logging.getLogger(__name__)
 
 
-@shared_task
-def process_pending_outbox_messages():
-    """Берет 50 сообщений и ставит их в очередь"""
+def claim_outbox_messages(shards=None, limit=None):
+    """Забирает пачку сообщений (при shards — только из них) и помечает их ENQUEUED"""
+    now = timezone.now()
+
     with transaction.atomic():
-        pending_messages = OutboxMessage.objects.select_for_update(
-            skip_locked=True
-        ).filter(
+        queryset = OutboxMessage.objects.select_for_update(skip_locked=True).filter(
             Q(status=OutboxStatus.PENDING)
             | Q(
                 status=OutboxStatus.ENQUEUED,
-                status_changed_at__lte=timezone.now() - timezone.timedelta(minutes=1),
+                status_changed_at__lte=now - timezone.timedelta(minutes=1),
             )
-        )[
-            :50
-        ]
+        )
+        if shards is not None:
+            queryset = queryset.filter(shard__in=shards)
+
+        message_ids = list(
+            queryset.order_by("id").values_list("id", flat=True)[
+                : limit or settings.OUTBOX_CLAIM_BATCH_SIZE
+            ]
+        )
 
-        for message in pending_messages:
-            message.status = OutboxStatus.ENQUEUED
-            message.status_changed_at = timezone.now()
-            message.save()
+        OutboxMessage.objects.filter(id__in=message_ids).update(
+            status=OutboxStatus.ENQUEUED, status_changed_at=now
+        )
 
-        for message in pending_messages:
-            process_single_outbox_message.delay(message.id)
+    return message_ids
 
-        logger.info(
-            f"Поставлено в очередь {len(pending_messages)} сообщений для обработки"
+
+@shared_task(ignore_result=True)
+def process_pending_outbox_messages(shards=None):
+    """Берет пачку сообщений и ставит их в очередь"""
+    if shards is None and settings.OUTBOX_SHARDED_CLAIMERS:
+        return {"enqueued": 0, "reason": "sharded_claimers"}
+
+    message_ids = claim_outbox_messages(shards)
+
+    for message_id in message_ids:
+        process_single_outbox_message.delay(message_id)
+
+    logger.info(
+        "Сообщения поставлены в очередь",
+        extra={"event": "outbox_enqueued", "count": len(message_ids)},
+    )
+    return {"enqueued": len(message_ids)}
+
+
+@shared_task(ignore_result=True)
+def release_scheduled_outbox_messages():
+    """Возвращает в PENDING запланированные сообщения, чей release_at наступил.
+
+    Повторы, fallback-и и повторы dead letters тоже проходят здесь: сообщения
+    получателей, у которых сейчас окно тишины, переносятся на его конец.
+    """
+    now = timezone.now()
+    scheduler = DeliveryScheduler()
+
+    with transaction.atomic():
+        rows = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True, of=("self",))
+            .filter(status=OutboxStatus.SCHEDULED, release_at__lte=now)
+            .order_by("release_at")
+            .values_list("id", "notification__user_id")[
+                : settings.OUTBOX_RELEASE_BATCH_SIZE
+            ]
         )
-        return {"enqueued": len(pending_messages)}
+        quiet_hours = scheduler.quiet_hours_by_user(user_id for _, user_id in rows)
 
+        released, deferred = [], []
+        for message_id, user_id in rows:
+            release_at = scheduler.release_at(user_id, now=now, quiet_hours=quiet_hours)
+            if release_at is None:
+                released.append(message_id)
+            else:
+                deferred.append(OutboxMessage(id=message_id, release_at=release_at))
 
-@shared_task(bind=True, max_retries=3)
-def process_single_outbox_message(self, outbox_message_id):
-    """Обработка одного сообщения с 3 попытками"""
+        OutboxMessage.objects.filter(id__in=released).update(
+            status=OutboxStatus.PENDING, status_changed_at=now
+        )
+        OutboxMessage.objects.bulk_update(deferred, ["release_at"])
+
+    logger.info(
+        "Запланированные сообщения выпущены",
+        extra={
+            "event": "outbox_released",
+            "count": len(released),
+            "deferred": len(deferred),
+        },
+    )
+    return {"released": len(released), "deferred": len(deferred)}
+
+
+@shared_task(ignore_result=True)
+def replay_dead_letters(filters, method=None, rate=None):
+    """Повторяет dead letters по фильтрам select_dead_letters, при method — через другой канал"""
+    if isinstance(filters, list):
+        # Задачи, поставленные прошлыми версиями со списком id
+        filters = {"ids": filters}
+    queryset = select_dead_letters(**filters)
+    return DeadLetterReplayer(rate=rate).replay(queryset, method=method)
+
+
+@shared_task(ignore_result=True)
+def process_single_outbox_message(outbox_message_id):
+    """Одна попытка отправки; повторы — через SCHEDULED и OutboxMessage.max_retries"""
     with transaction.atomic():
         message = (
-            OutboxMessage.objects.select_for_update(skip_locked=True)
+            OutboxMessage.objects.select_for_update(skip_locked=True, of=("self",))
+            .select_related("notification")
             .filter(id=outbox_message_id, status=OutboxStatus.ENQUEUED)
             .first()
         )
@@ -55,45 +132,117 @@ def process_single_outbox_message(self, outbox_message_id):
             return {"status": "skipped", "reason": "not_found"}
 
         if not message.can_retry():
-            logger.warning(f"Сообщение {outbox_message_id} превысило лимит повторов")
-            message.mark_failed("Превышен лимит повторных попыток")
-            message.create_fallback()
+            log_fields = {
+                "outbox_message_id": outbox_message_id,
+                "notification_id": message.notification_id,
+                "method": message.method,
+                "attempt": message.attempt_count,
+            }
+            logger.warning(
+                "Сообщение превысило лимит повторов",
+                extra={"event": "retry_limit", **log_fields},
+            )
+            fail_permanently(message, "Превышен лимит повторных попыток", log_fields)
             return {"status": "failed", "reason": "retry_limit"}
 
         message.start_processing()
 
+    log_fields = {
+        "outbox_message_id": outbox_message_id,
+        "notification_id": message.notification_id,
+        "method": message.method,
+        "attempt": message.attempt_count,
+    }
+    outcome = AttemptOutcome.FAILED
+    started = time.perf_counter()
     try:
-        success = DeliveryService().send_via_method(
+        result = DeliveryService().send_via_method(
             message.method, message.notification, message.payload
         )
     except Exception as e:
-        success = False
-        logger.error(f"Ошибка отправки сообщения {outbox_message_id}: {str(e)}")
+        result = DeliveryResult(False, error=f"{type(e).__name__}: {e}")
+        outcome = AttemptOutcome.ERROR
+        logger.error(
+            "Ошибка отправки сообщения",
+            extra={"event": "delivery_error", "error": str(e), **log_fields},
+        )
+    latency_ms = (time.perf_counter() - started) * 1000
+    log_fields["latency_ms"] = round(latency_ms, 1)
+
+    success = bool(result)
+    error = result.error or f"Не удалось отправить через {message.method}"
+    recorder.record(
+        outbox_message_id=outbox_message_id,
+        method=message.method,
+        outcome=AttemptOutcome.SENT if success else outcome,
+        latency_ms=round(latency_ms),
+        provider_id=result.provider_id[:64],
+        error="" if success else error[:500],
+        attempted_at=timezone.now(),
+    )
 
     with transaction.atomic():
-        message = OutboxMessage.objects.select_for_update().get(id=outbox_message_id)
+        message = (
+            OutboxMessage.objects.select_for_update(of=("self",))
+            .select_related("notification")
+            .get(id=outbox_message_id)
+        )
 
         if success:
             message.mark_success()
             message.notification.is_sent = True
-            message.notification.save()
+            message.notification.save(update_fields=["is_sent", "updated_at"])
+            record_transition(message.method, "sent")
             logger.info(
-                f"Сообщение {outbox_message_id} отправлено через {message.method}"
+                "Сообщение отправлено",
+                extra={"event": "delivery_sent", **log_fields},
             )
             return {"status": "sent", "method": message.method}
+        elif message.can_retry():
+            retry_delay = 10 * (2**message.attempt_count)
+            message.schedule_retry(error, retry_delay)
+            record_transition(message.method, "retried")
+            logger.info(
+                "Повторная отправка сообщения",
+                extra={
+                    "event": "delivery_retry",
+                    "retry_delay": retry_delay,
+                    **log_fields,
+                },
+            )
+            return {"status": "retry", "method": message.method}
         else:
-            message.mark_failed(f"Не удалось отправить через {message.method}")
-
-            if message.can_retry():
-                retry_delay = 10 * (2**message.attempt_count)
-                logger.info(
-                    f"Повторная отправка сообщения {outbox_message_id} через {retry_delay}с"
-                )
-                raise self.retry(countdown=retry_delay)
-            else:
-                fallback = message.create_fallback()
-                if fallback:
-                    logger.info(
-                        f"Создано резервное сообщение {fallback.id} с методом {fallback.method}"
-                    )
-                return {"status": "failed", "method": message.method}
+            fail_permanently(message, error, log_fields)
+            return {"status": "failed", "method": message.method}
+
+
+def fail_permanently(message, reason, log_fields):
+    """Помечает сообщение FAILED и создает fallback, а если каналов не осталось — dead letter"""
+    message.mark_failed(reason)
+    record_transition(message.method, "failed")
+
+    fallback = message.create_fallback()
+    if fallback:
+        record_transition(message.method, "fallbacks")
+        logger.info(
+            "Создано резервное сообщение",
+            extra={
+                "event": "fallback_created",
+                "fallback_id": fallback.id,
+                "fallback_method": fallback.method,
+                **log_fields,
+            },
+        )
+    elif not message.notification.is_sent:
+        message.move_to_dead_letter()
+        record_transition(message.method, "dead_lettered")
+        logger.warning(
+            "Сообщение перемещено в dead letter",
+            extra={"event": "dead_lettered", "reason": reason, **log_fields},
+        )
+    return fallback
+
+
+def record_transition(method, transition):
+    """Учитывает переход в статистике только после коммита транзакции"""
+    transaction.on_commit(lambda: recorder.record_transition(method, transition))
@@ -5,6 +5,12 @@ from . import views
 
 router = DefaultRouter()
 router.register(r"notifications", views.NotificationViewSet)
+router.register(r"quiet-hours", views.QuietHoursViewSet)
+router.register(r"channel-preferences", views.ChannelPreferenceViewSet)
+router.register(
+    r"delivery-stats", views.DeliveryStatsViewSet, basename="delivery-stats"
+)
+router.register(r"dead-letters", views.DeadLetterViewSet)
 
 urlpatterns = [
     path("", include(router.urls)),
@@ -1,9 +1,31 @@
+from django.conf import settings
 from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
-from apps.notifications.models import Notification
-from apps.notifications.serializers import CreateNotificationSerializer, NotificationSerializer
+from apps.notifications.dead_letters import select_dead_letters
+from apps.notifications.models import (
+    ChannelPreference,
+    DeadLetter,
+    Notification,
+    QuietHours,
+)
+from apps.notifications.recipients import RecipientNormalizer, UndeliverableNotification
+from apps.notifications.serializers import (
+    ChannelPreferenceSerializer,
+    CreateNotificationSerializer,
+    DeadLetterReplaySerializer,
+    DeadLetterSerializer,
+    DeliveryStatsQuerySerializer,
+    NotificationSerializer,
+    OutboxMessageSerializer,
+    QuietHoursSerializer,
+    RecipientValidationSerializer,
+)
 from apps.notifications.services import NotificationService
+from apps.notifications.stats import bucket_stats
+from apps.notifications.tasks import replay_dead_letters
 
 
 class NotificationViewSet(viewsets.ModelViewSet):
@@ -12,6 +34,10 @@ class NotificationViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         if self.action == "create":
             return CreateNotificationSerializer
+        if self.action == "validate_recipients":
+            return RecipientValidationSerializer
+        if self.action == "outbox":
+            return OutboxMessageSerializer
         return NotificationSerializer
 
     def create(self, request, *args, **kwargs):
@@ -20,14 +46,126 @@ class NotificationViewSet(viewsets.ModelViewSet):
 
         data = serializer.validated_data
         service = NotificationService()
+        fields = {
+            "user_id": data["user_id"],
+            "title": data["title"],
+            "message": data["message"],
+            "methods": data.get("delivery_methods"),
+            "send_at": data.get("send_at"),
+            "notification_type": data.get("notification_type", ""),
+        }
 
-        notification = service.create_notification(
-            user_id=data["user_id"],
-            title=data["title"],
-            message=data["message"],
-            methods=data.get("delivery_methods", ["SMS"]),
-        )
+        try:
+            if settings.NOTIFICATION_INGEST_MODE == "buffered":
+                notification_id = service.enqueue_notification(**fields)
+                return Response(
+                    {"id": notification_id, "status": "accepted"}, status=status.HTTP_202_ACCEPTED
+                )
+
+            notification = service.create_notification(**fields)
+        except UndeliverableNotification as e:
+            raise ValidationError({"delivery_methods": [str(e)]})
 
         return Response(
             {"id": notification.id, "status": "created"}, status=status.HTTP_201_CREATED
         )
+
+    @action(detail=True, methods=["get"])
+    def outbox(self, request, pk=None):
+        """Outbox-сообщения уведомления с журналом попыток доставки"""
+        notification = self.get_object()
+        messages = notification.outbox_messages.prefetch_related("attempts")
+        return Response(self.get_serializer(messages.order_by("id"), many=True).data)
+
+    @action(detail=False, methods=["post"], url_path="validate-recipients")
+    def validate_recipients(self, request):
+        """Пакетная проверка и нормализация адресов одного канала (списки рассылок)"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        method = serializer.validated_data["method"]
+        values = serializer.validated_data["recipients"]
+        normalized = RecipientNormalizer().normalize_many(method, values)
+
+        results = [
+            {"input": value, "normalized": address, "valid": address is not None}
+            for value, address in zip(values, normalized)
+        ]
+        valid = sum(result["valid"] for result in results)
+
+        return Response(
+            {"method": method, "valid": valid, "invalid": len(results) - valid, "results": results}
+        )
+
+
+class ChannelPreferenceViewSet(viewsets.ModelViewSet):
+    queryset = ChannelPreference.objects.all()
+    serializer_class = ChannelPreferenceSerializer
+    filterset_fields = ["user_id", "notification_type"]
+
+
+class QuietHoursViewSet(viewsets.ModelViewSet):
+    queryset = QuietHours.objects.all()
+    serializer_class = QuietHoursSerializer
+    lookup_field = "user_id"
+
+
+class DeadLetterViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = DeadLetter.objects.all()
+    filterset_fields = {
+        "method": ["exact"],
+        "created_at": ["gte", "lte"],
+        "replayed_at": ["isnull"],
+    }
+
+    def get_serializer_class(self):
+        if self.action == "replay":
+            return DeadLetterReplaySerializer
+        return DeadLetterSerializer
+
+    @action(detail=False, methods=["post"])
+    def replay(self, request):
+        """Ставит выбранные dead letters на повтор в фоне с ограничением скорости"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        # В задачу уходят фильтры, а не список id: записи выбирает воркер
+        filters = serializer.filters()
+        count = select_dead_letters(**{**filters, "limit": None}).count()
+        if "limit" in data:
+            count = min(count, data["limit"])
+        if count:
+            replay_dead_letters.delay(
+                filters, method=data.get("to_method"), rate=data.get("rate")
+            )
+
+        return Response(
+            {"status": "accepted", "count": count},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class DeliveryStatsViewSet(viewsets.GenericViewSet):
+    """Счетчики доставки по каналам и интервалам из минутных rollup-ов"""
+
+    serializer_class = DeliveryStatsQuerySerializer
+
+    def list(self, request):
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        query = serializer.validated_data
+
+        return Response(
+            {
+                "since": query["since"],
+                "until": query["until"],
+                "interval": query["interval"],
+                "results": bucket_stats(
+                    query["since"],
+                    query["until"],
+                    query["interval"],
+                    query.get("method"),
+                ),
+            }
+        )
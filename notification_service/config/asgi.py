@@ -2,6 +2,8 @@
 ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests to ``/api/ingest/notifications/`` bypass DRF and the middleware stack
+and are served by ``apps.notifications.ingest.IngestApplication``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -12,5 +14,13 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+# Под ASGI синхронный ORM работает в пуле потоков, и постоянное соединение
+# держит каждый поток: при CONN_MAX_AGE > 0 они копятся до размера пула
+# на каждый воркер. Поэтому по умолчанию соединения здесь не переиспользуются.
+os.environ.setdefault("DB_CONN_MAX_AGE", "0")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from apps.notifications.ingest import IngestRouter  # noqa: E402
+
+application = IngestRouter(django_application)
@@ -13,6 +13,10 @@ app.conf.beat_schedule = {
         "task": "apps.notifications.tasks.process_pending_outbox_messages",
         "schedule": 10.0,
     },
+    "release-scheduled-outbox-every-5s": {
+        "task": "apps.notifications.tasks.release_scheduled_outbox_messages",
+        "schedule": 5.0,
+    },
 }
 
 app.conf.timezone = "UTC"
@@ -53,6 +53,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "apps.notifications.profiling.QueryProfilingMiddleware",
+    "apps.notifications.db_router.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -62,6 +64,10 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Замер SQL count / SQL time / wall time каждого запроса и Celery-задачи
+# (логируется с event=perf, см. apps.notifications.profiling)
+PERF_PROFILING = os.getenv("PERF_PROFILING", "False") == "True"
+
 ROOT_URLCONF = "config.urls"
 
 TEMPLATES = [
@@ -93,9 +99,31 @@ DATABASES = {
         "PASSWORD": os.getenv("POSTGRES_PASSWORD"),  # Пароль для этого пользователя
         "HOST": os.getenv("POSTGRES_HOST"),  # Адрес, на котором развернут сервер БД
         "PORT": os.getenv("POSTGRES_PORT"),  # Порт, на котором работает сервер БД
+        # Постоянные соединения с проверкой перед повторным использованием
+        # (WSGI и Celery; config/asgi.py по умолчанию задает 0)
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": True,
+        # За pgbouncer в transaction mode серверные курсоры не переживают транзакцию
+        "DISABLE_SERVER_SIDE_CURSORS": os.getenv("DB_TRANSACTION_POOLER", "False")
+        == "True",
     }
 }
 
+# Read-реплика: безопасные HTTP-запросы API читают с нее (ReplicaRoutingMiddleware),
+# записи, Celery-задачи и claim outbox всегда идут в primary. После записи клиент
+# REPLICA_STICKY_SECONDS секунд читает с primary (read-your-writes через cookie).
+if os.getenv("POSTGRES_REPLICA_HOST"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": os.getenv("POSTGRES_REPLICA_HOST"),
+        "PORT": os.getenv("POSTGRES_REPLICA_PORT", os.getenv("POSTGRES_PORT")),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["apps.notifications.db_router.PrimaryReplicaRouter"]
+REPLICA_STICKY_COOKIE = os.getenv("REPLICA_STICKY_COOKIE", "read_primary")
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", 5))
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -151,14 +179,91 @@ REST_FRAMEWORK = {
 
 # Celery Configuration
 
-CELERY_BROKER_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
-CELERY_RESULT_BACKEND = os.getenv("REDIS_URL", "redis://redis:6379/0")
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+
+CELERY_BROKER_URL = REDIS_URL
+CELERY_RESULT_BACKEND = REDIS_URL
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = "UTC"
 CELERY_TASK_DEFAULT_QUEUE = "notifications"
 
+# Outbox claimers
+# Сообщения раскладываются по шардам (notification_id % OUTBOX_SHARD_COUNT).
+# При OUTBOX_SHARDED_CLAIMERS beat-поллер отключается, а процессы
+# `python manage.py run_outbox_claimer` делят шарды через аренды с heartbeat.
+OUTBOX_SHARD_COUNT = int(os.getenv("OUTBOX_SHARD_COUNT", 16))
+OUTBOX_SHARD_LEASE_TTL = int(os.getenv("OUTBOX_SHARD_LEASE_TTL", 30))
+OUTBOX_CLAIM_BATCH_SIZE = int(os.getenv("OUTBOX_CLAIM_BATCH_SIZE", 50))
+OUTBOX_SHARDED_CLAIMERS = os.getenv("OUTBOX_SHARDED_CLAIMERS", "False") == "True"
+
+# Scheduled delivery
+# Сообщения с send_at в будущем или попавшие в окно тишины получателя создаются
+# в статусе SCHEDULED и выпускаются задачей release_scheduled_outbox_messages
+# со случайным сдвигом до SCHEDULE_JITTER_SECONDS (для send_at) или
+# QUIET_HOURS_SPREAD_SECONDS (после окончания окна тишины).
+SCHEDULE_JITTER_SECONDS = int(os.getenv("SCHEDULE_JITTER_SECONDS", 60))
+QUIET_HOURS_SPREAD_SECONDS = int(os.getenv("QUIET_HOURS_SPREAD_SECONDS", 1800))
+OUTBOX_RELEASE_BATCH_SIZE = int(os.getenv("OUTBOX_RELEASE_BATCH_SIZE", 1000))
+
+# Dead letters
+# Сообщения без оставшихся повторов и каналов fallback-а попадают в DeadLetter.
+# Повтор (`python manage.py replay_dead_letters`, POST /api/dead-letters/replay/)
+# создает SCHEDULED-сообщения со скоростью DEAD_LETTER_REPLAY_RATE в секунду,
+# фиксируя их пачками по DEAD_LETTER_REPLAY_BATCH_SIZE. По умолчанию это половина
+# пропускной способности beat-поллера (OUTBOX_CLAIM_BATCH_SIZE раз в 10 секунд,
+# config/celery.py): claim идет по id, и более быстрый повтор копил бы очередь,
+# за которой ждет новый трафик. Выше DEAD_LETTER_REPLAY_MAX_RATE (вся пропускная
+# способность поллера) скорость не задать ни в API, ни в команде.
+DEAD_LETTER_REPLAY_MAX_RATE = float(
+    os.getenv("DEAD_LETTER_REPLAY_MAX_RATE", OUTBOX_CLAIM_BATCH_SIZE / 10)
+)
+DEAD_LETTER_REPLAY_RATE = float(
+    os.getenv("DEAD_LETTER_REPLAY_RATE", DEAD_LETTER_REPLAY_MAX_RATE / 2)
+)
+DEAD_LETTER_REPLAY_BATCH_SIZE = int(os.getenv("DEAD_LETTER_REPLAY_BATCH_SIZE", 500))
+
+# Channel preferences
+# Предпочтения каналов кэшируются в памяти процесса по получателю (не больше
+# ROUTING_TABLE_MAX_USERS). Версия предпочтений получателя хранится в общем кэше
+# (Redis) и увеличивается при изменении его ChannelPreference; процессы сверяют
+# ее раз в ROUTING_TABLE_CHECK_SECONDS.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv("CACHE_URL", REDIS_URL),
+    }
+}
+ROUTING_TABLE_CHECK_SECONDS = float(os.getenv("ROUTING_TABLE_CHECK_SECONDS", 5))
+ROUTING_TABLE_MAX_USERS = int(os.getenv("ROUTING_TABLE_MAX_USERS", 100000))
+
+# Delivery attempts
+# Попытки доставки (DeliveryAttempt) пишутся фоновым потоком воркера пачками
+# по DELIVERY_ATTEMPT_BATCH_SIZE или раз в DELIVERY_ATTEMPT_FLUSH_INTERVAL_MS.
+DELIVERY_ATTEMPT_BATCH_SIZE = int(os.getenv("DELIVERY_ATTEMPT_BATCH_SIZE", 200))
+DELIVERY_ATTEMPT_FLUSH_INTERVAL_MS = int(
+    os.getenv("DELIVERY_ATTEMPT_FLUSH_INTERVAL_MS", 1000)
+)
+
+# Ingestion
+# direct — уведомление и outbox пишутся в Postgres в запросе;
+# buffered — запрос попадает в Redis stream и сразу получает id (202),
+# в БД его переносит `python manage.py flush_ingest_buffer` пачками.
+NOTIFICATION_INGEST_MODE = os.getenv("NOTIFICATION_INGEST_MODE", "direct")
+INGEST_STREAM = os.getenv("INGEST_STREAM", "notifications:ingest")
+INGEST_STREAM_GROUP = os.getenv("INGEST_STREAM_GROUP", "flushers")
+INGEST_FLUSH_BATCH_SIZE = int(os.getenv("INGEST_FLUSH_BATCH_SIZE", 500))
+INGEST_FLUSH_INTERVAL_MS = int(os.getenv("INGEST_FLUSH_INTERVAL_MS", 200))
+INGEST_CLAIM_IDLE_MS = int(os.getenv("INGEST_CLAIM_IDLE_MS", 30000))
+# Запись с ошибкой данных, которую не удалось записать INGEST_MAX_DELIVERIES раз,
+# переносится в INGEST_DEAD_STREAM, чтобы не блокировать остальные; вернуть ее
+# в прием — `python manage.py redrive_ingest_dead_stream`. Недоступность БД
+# записи в dead-stream не переносит.
+INGEST_MAX_DELIVERIES = int(os.getenv("INGEST_MAX_DELIVERIES", 5))
+INGEST_DEAD_STREAM = os.getenv("INGEST_DEAD_STREAM", "notifications:ingest:dead")
+INGEST_ID_BLOCK_SIZE = int(os.getenv("INGEST_ID_BLOCK_SIZE", 100))
+
 TEST_RUNNER = "django.test.runner.DiscoverRunner"
 TEST_DISCOVERY_ROOT = os.path.join(BASE_DIR, "tests")
 
@@ -188,6 +293,11 @@ CHAT_ID = os.getenv("CHAT_ID")
 
 # Logging
 LOG_LEVEL = os.getenv("LOG_LEVEL", default="INFO")
+# sync — текстовые логи в консоль и файл прямо из рабочего потока;
+# async — JSON через очередь, запись выполняет фоновый поток listener-а
+LOG_MODE = os.getenv("LOG_MODE", default="sync")
+# Доля логов об успешной доставке (event=delivery_sent), попадающих в вывод
+LOG_SUCCESS_SAMPLE_RATE = float(os.getenv("LOG_SUCCESS_SAMPLE_RATE", default=1.0))
 
 LOGGING = {
     "version": 1,
@@ -198,6 +308,12 @@ LOGGING = {
             "style": "{",
         },
     },
+    "filters": {
+        "sample_success": {
+            "()": "apps.notifications.logging_utils.SamplingFilter",
+            "rate": LOG_SUCCESS_SAMPLE_RATE,
+        },
+    },
     "handlers": {
         "console": {
             "level": LOG_LEVEL,
@@ -222,6 +338,11 @@ LOGGING = {
             "level": LOG_LEVEL,
             "propagate": False,
         },
+        # Сэмплирование на логгерах, которые пишут delivery_sent/sms_sent: одно
+        # решение на запись для всех обработчиков (фильтры логгера не действуют
+        # на записи дочерних логгеров, поэтому не на apps.notifications)
+        "apps.notifications.tasks": {"filters": ["sample_success"]},
+        "apps.notifications.gateways": {"filters": ["sample_success"]},
         "celery": {
             "handlers": ["console"],
             "level": "INFO",
@@ -229,3 +350,11 @@ LOGGING = {
         },
     },
 }
+
+if LOG_MODE == "async":
+    LOGGING["handlers"]["async"] = {
+        "level": LOG_LEVEL,
+        "class": "apps.notifications.logging_utils.QueueListenerHandler",
+        "filename": BASE_DIR / "notifications.log",
+    }
+    LOGGING["loggers"]["apps.notifications"]["handlers"] = ["async"]
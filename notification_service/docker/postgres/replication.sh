@@ -0,0 +1,4 @@
+#!/bin/sh
+# Разрешает потоковую репликацию для сервиса db_replica (профиль replica)
+set -e
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
@@ -0,0 +1,153 @@
+import time
+from unittest import mock
+from unittest.mock import DEFAULT
+
+from django.db import DatabaseError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.notifications.attempts import DeliveryAttemptRecorder
+from apps.notifications.models import (
+    AttemptOutcome,
+    DeliveryAttempt,
+    DeliveryStatsBucket,
+)
+from apps.notifications.services import NotificationService
+
+
+def attempt_fields(message, **fields):
+    return {
+        "outbox_message_id": message.id,
+        "method": message.method,
+        "outcome": AttemptOutcome.SENT,
+        "latency_ms": 10,
+        "attempted_at": timezone.now(),
+        **fields,
+    }
+
+
+# Поток рекордера пишет своим подключением: данные теста должны быть закоммичены
+class DeliveryAttemptRecorderTests(TransactionTestCase):
+    """Пакетная запись попыток доставки фоновым потоком"""
+
+    def setUp(self):
+        notification = NotificationService().create_notification(
+            user_id=1, title="title", message="message", methods=["SMS"]
+        )
+        self.message = notification.outbox_messages.get()
+        self.recorder = DeliveryAttemptRecorder()
+        self.addCleanup(self.recorder.stop)
+
+    def wait_for(self, condition, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("Рекордер не записал пачку вовремя")
+            time.sleep(0.01)
+
+    def record(self, count):
+        for _ in range(count):
+            self.recorder.record(**attempt_fields(self.message))
+
+    @override_settings(
+        DELIVERY_ATTEMPT_BATCH_SIZE=3, DELIVERY_ATTEMPT_FLUSH_INTERVAL_MS=60000
+    )
+    def test_full_batches_are_written_without_waiting(self):
+        with mock.patch.object(
+            DeliveryAttempt.objects,
+            "bulk_create",
+            wraps=DeliveryAttempt.objects.bulk_create,
+        ) as bulk_create:
+            self.record(7)
+            self.wait_for(lambda: bulk_create.call_count == 2)
+
+            self.assertEqual(DeliveryAttempt.objects.count(), 6)
+
+            # Остаток неполной пачки дописывается при остановке
+            self.recorder.stop()
+
+        self.assertEqual(
+            [len(call.args[0]) for call in bulk_create.call_args_list], [3, 3, 1]
+        )
+        self.assertEqual(DeliveryAttempt.objects.count(), 7)
+
+    @override_settings(
+        DELIVERY_ATTEMPT_BATCH_SIZE=100, DELIVERY_ATTEMPT_FLUSH_INTERVAL_MS=50
+    )
+    def test_partial_batch_is_written_after_interval(self):
+        self.record(2)
+
+        self.wait_for(lambda: DeliveryAttempt.objects.count() == 2)
+        self.assertTrue(self.recorder._thread.is_alive())
+
+    @override_settings(
+        DELIVERY_ATTEMPT_BATCH_SIZE=100, DELIVERY_ATTEMPT_FLUSH_INTERVAL_MS=60000
+    )
+    def test_stop_flushes_pending_attempts(self):
+        self.record(5)
+        self.recorder.stop()
+
+        self.assertEqual(DeliveryAttempt.objects.count(), 5)
+        self.assertIsNone(self.recorder._thread)
+
+    @override_settings(
+        DELIVERY_ATTEMPT_BATCH_SIZE=2, DELIVERY_ATTEMPT_FLUSH_INTERVAL_MS=60000
+    )
+    def test_failed_batch_is_dropped_and_recorder_keeps_running(self):
+        bulk_create = DeliveryAttempt.objects.bulk_create
+        with mock.patch.object(
+            DeliveryAttempt.objects,
+            "bulk_create",
+            wraps=bulk_create,
+            side_effect=[DatabaseError("db down"), DEFAULT],
+        ), self.assertLogs("apps.notifications.attempts", "ERROR") as logs:
+            self.record(2)
+            self.wait_for(lambda: logs.records)
+            self.recorder.record(**attempt_fields(self.message, provider_id="next"))
+            self.recorder.record(**attempt_fields(self.message, provider_id="next"))
+            self.recorder.stop()
+
+        # Журнал попыток не должен ронять доставку: пачка теряется, статистика — нет
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(logs.records[0].event, "delivery_attempts_error")
+        self.assertEqual(
+            list(DeliveryAttempt.objects.values_list("provider_id", flat=True)),
+            ["next", "next"],
+        )
+        self.assertEqual(
+            sum(DeliveryStatsBucket.objects.values_list("attempts", flat=True)), 4
+        )
+
+
+class OutboxAttemptsApiTests(TestCase):
+    """Журнал попыток в /api/notifications/{id}/outbox/"""
+
+    def test_outbox_lists_attempts(self):
+        notification = NotificationService().create_notification(
+            user_id=1, title="title", message="message", methods=["SMS"]
+        )
+        message = notification.outbox_messages.get()
+        DeliveryAttempt.objects.bulk_create(
+            [
+                DeliveryAttempt(
+                    **attempt_fields(
+                        message, outcome=AttemptOutcome.ERROR, error="Timeout"
+                    )
+                ),
+                DeliveryAttempt(**attempt_fields(message, provider_id="sms-1")),
+            ]
+        )
+
+        response = APIClient().get(f"/api/notifications/{notification.id}/outbox/")
+
+        self.assertEqual(response.status_code, 200)
+        (outbox,) = response.json()
+        self.assertEqual(outbox["id"], message.id)
+        self.assertEqual(
+            [
+                (attempt["outcome"], attempt["error"], attempt["provider_id"])
+                for attempt in outbox["attempts"]
+            ],
+            [("ERROR", "Timeout", ""), ("SENT", "", "sms-1")],
+        )
@@ -0,0 +1,88 @@
+from unittest import mock
+
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase
+
+from apps.notifications.db_router import (
+    PRIMARY,
+    REPLICA,
+    PrimaryReplicaRouter,
+    ReplicaRoutingMiddleware,
+    replica_reads,
+)
+from apps.notifications.models import Notification
+
+
+# Реплика — то же подключение, что и primary: тестам важен только выбор алиаса.
+# TransactionTestCase, потому что TestCase держит весь тест внутри atomic.
+@mock.patch.dict(settings.DATABASES, {REPLICA: settings.DATABASES[PRIMARY]})
+class PrimaryReplicaRouterTests(TransactionTestCase):
+    """Выбор базы роутером"""
+
+    router = PrimaryReplicaRouter()
+
+    def test_reads_go_to_primary_by_default(self):
+        self.assertEqual(self.router.db_for_read(Notification), PRIMARY)
+
+    def test_replica_reads_go_to_replica(self):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Notification), REPLICA)
+
+    def test_reads_inside_atomic_go_to_primary(self):
+        with replica_reads(), transaction.atomic():
+            self.assertEqual(self.router.db_for_read(Notification), PRIMARY)
+
+    def test_writes_go_to_primary(self):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_write(Notification), PRIMARY)
+
+    def test_without_replica_reads_go_to_primary(self):
+        del settings.DATABASES[REPLICA]
+
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Notification), PRIMARY)
+
+
+@mock.patch.dict(settings.DATABASES, {REPLICA: settings.DATABASES[PRIMARY]})
+class ReplicaRoutingMiddlewareTests(TransactionTestCase):
+    """Чтения HTTP-запросов с реплики и read-your-writes через cookie"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.status = 200
+
+    def get_response(self, request):
+        self.db = PrimaryReplicaRouter().db_for_read(Notification)
+        return HttpResponse(status=self.status)
+
+    def call(self, request):
+        return ReplicaRoutingMiddleware(self.get_response)(request)
+
+    def test_safe_request_reads_from_replica(self):
+        response = self.call(self.factory.get("/api/notifications/"))
+
+        self.assertEqual(self.db, REPLICA)
+        self.assertNotIn(settings.REPLICA_STICKY_COOKIE, response.cookies)
+
+    def test_reads_after_write_stick_to_primary(self):
+        self.status = 201
+        response = self.call(self.factory.post("/api/notifications/"))
+
+        cookie = response.cookies[settings.REPLICA_STICKY_COOKIE]
+        self.assertEqual(cookie["max-age"], settings.REPLICA_STICKY_SECONDS)
+
+        self.status = 200
+        request = self.factory.get("/api/notifications/")
+        request.COOKIES[settings.REPLICA_STICKY_COOKIE] = cookie.value
+        self.call(request)
+
+        self.assertEqual(self.db, PRIMARY)
+
+    def test_failed_write_does_not_stick(self):
+        self.status = 400
+        response = self.call(self.factory.post("/api/notifications/"))
+
+        self.assertEqual(self.db, PRIMARY)
+        self.assertNotIn(settings.REPLICA_STICKY_COOKIE, response.cookies)
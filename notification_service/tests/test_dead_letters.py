@@ -0,0 +1,66 @@
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.notifications.models import DeadLetter, OutboxMessage, OutboxStatus
+from apps.notifications.services import NotificationService
+from apps.notifications.tasks import replay_dead_letters
+
+
+class DeadLetterReplayTests(TestCase):
+    """Повтор dead letters через API"""
+
+    def setUp(self):
+        service = NotificationService()
+        for reason in ("Timeout", "Timeout", "Invalid number"):
+            notification = service.create_notification(
+                user_id=1, title="title", message="message", methods=["SMS"]
+            )
+            message = notification.outbox_messages.get()
+            message.status = OutboxStatus.FAILED
+            message.save()
+            DeadLetter.objects.create(
+                outbox_message=message,
+                notification=notification,
+                method=message.method,
+                reason=reason,
+            )
+
+    @mock.patch("apps.notifications.views.replay_dead_letters.delay")
+    def test_replay_passes_filters_not_ids(self, delay):
+        response = APIClient().post(
+            "/api/dead-letters/replay/",
+            {"reason_contains": "timeout", "created_after": "2020-01-01T00:00:00Z"},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["count"], 2)
+        (filters,), options = delay.call_args
+        self.assertEqual(
+            filters,
+            {"reason_contains": "timeout", "created_after": "2020-01-01T00:00:00Z"},
+        )
+
+        # Воркер сам выбирает записи по фильтрам
+        self.assertEqual(replay_dead_letters(filters, **options)["replayed"], 2)
+        self.assertEqual(
+            OutboxMessage.objects.filter(status=OutboxStatus.SCHEDULED).count(), 2
+        )
+        self.assertEqual(DeadLetter.objects.filter(replayed_at__isnull=True).count(), 1)
+
+    @override_settings(DEAD_LETTER_REPLAY_MAX_RATE=5)
+    @mock.patch("apps.notifications.views.replay_dead_letters.delay")
+    def test_rate_is_capped_by_poller_capacity(self, delay):
+        response = APIClient().post(
+            "/api/dead-letters/replay/", {"rate": 1e6}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("rate", response.json())
+        delay.assert_not_called()
+        with self.assertRaises(CommandError):
+            call_command("replay_dead_letters", "--rate", "1000000")
+        self.assertEqual(DeadLetter.objects.filter(replayed_at__isnull=True).count(), 3)
@@ -0,0 +1,55 @@
+import json
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from apps.notifications.ingest import INGEST_PATH, IngestApplication
+
+
+def call(application, body):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": json.dumps(body).encode()}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": INGEST_PATH}
+    async_to_sync(application)(scope, receive, send)
+    return messages[0]["status"], dict(messages[0]["headers"])
+
+
+@mock.patch(
+    "apps.notifications.ingest.submit_notification",
+    new=mock.AsyncMock(return_value=(201, {"id": 1, "status": "created"})),
+)
+class IngestApplicationTests(SimpleTestCase):
+    """После записи через ASGI клиент читает с primary, как и через DRF"""
+
+    payload = {"user_id": 1, "title": "title", "message": "message"}
+
+    @mock.patch.dict(settings.DATABASES, {"replica": {}})
+    def test_sticky_cookie_with_replica(self):
+        status, headers = call(IngestApplication(), self.payload)
+
+        self.assertEqual(status, 201)
+        cookie = headers[b"set-cookie"].decode()
+        self.assertTrue(cookie.startswith(f"{settings.REPLICA_STICKY_COOKIE}=1;"))
+        self.assertIn(f"Max-Age={settings.REPLICA_STICKY_SECONDS}", cookie)
+        self.assertIn("HttpOnly", cookie)
+
+    @mock.patch.dict(settings.DATABASES, {"replica": {}})
+    def test_no_cookie_on_error(self):
+        status, headers = call(IngestApplication(), {"user_id": 1})
+
+        self.assertEqual(status, 400)
+        self.assertNotIn(b"set-cookie", headers)
+
+    def test_no_cookie_without_replica(self):
+        status, headers = call(IngestApplication(), self.payload)
+
+        self.assertEqual(status, 201)
+        self.assertNotIn(b"set-cookie", headers)
@@ -0,0 +1,177 @@
+import json
+import time
+from datetime import timedelta
+from unittest import mock
+
+import fakeredis
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.notifications.buffer import IdAllocator, IngestBuffer
+from apps.notifications.flusher import IngestFlusher
+from apps.notifications.models import (
+    Notification,
+    OutboxMessage,
+    OutboxStatus,
+    QuietHours,
+)
+
+
+def make_entry(notification_id, title="title", **fields):
+    return {
+        "id": notification_id,
+        "user_id": 1,
+        "title": title,
+        "message": "message",
+        "channels": ["SMS"],
+        "recipients": {"SMS": "+79001234567"},
+        "send_at": None,
+        "notification_type": "",
+        **fields,
+    }
+
+
+@override_settings(
+    INGEST_CLAIM_IDLE_MS=0,
+    INGEST_FLUSH_INTERVAL_MS=10,
+    INGEST_DEAD_STREAM="notifications:ingest:dead",
+)
+class IngestFlusherTests(TestCase):
+    """Каждая принятая запись буфера превращается ровно в одно уведомление"""
+
+    def setUp(self):
+        self.buffer = IngestBuffer(client=fakeredis.FakeRedis())
+        self.buffer.ensure_group()
+        self.flusher = IngestFlusher("test", buffer=self.buffer)
+
+    def pending(self):
+        return self.buffer.client.xpending(self.buffer.stream, self.buffer.group)[
+            "pending"
+        ]
+
+    def test_replay_after_crash_before_ack(self):
+        self.buffer.append(make_entry(101))
+        self.buffer.append(make_entry(102))
+
+        with mock.patch.object(IngestBuffer, "ack", side_effect=ConnectionError):
+            with self.assertRaises(ConnectionError):
+                self.flusher.run_once()
+        self.assertEqual(self.pending(), 2)
+
+        # Соседний flusher забирает зависшие записи и не создает дублей
+        self.assertEqual(self.flusher.run_once(), 2)
+
+        self.assertEqual(Notification.objects.count(), 2)
+        self.assertEqual(OutboxMessage.objects.count(), 2)
+        self.assertEqual(self.pending(), 0)
+
+    def test_id_collision_is_dead_lettered_once(self):
+        self.buffer.append(make_entry(777, title="first"))
+        self.buffer.append(make_entry(777, title="second"))
+
+        with mock.patch.object(IngestBuffer, "ack", side_effect=ConnectionError):
+            with self.assertRaises(ConnectionError):
+                self.flusher.run_once()
+        # Перечитывание после падения до XACK не создает новых строк
+        self.flusher.run_once()
+
+        self.assertEqual(
+            list(Notification.objects.values_list("id", "title")), [(777, "first")]
+        )
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+        self.assertEqual(self.pending(), 0)
+        dead = self.buffer.client.xrange("notifications:ingest:dead")
+        self.assertEqual(
+            {json.loads(fields[b"data"])["title"] for _, fields in dead}, {"second"}
+        )
+
+    @override_settings(INGEST_MAX_DELIVERIES=2, INGEST_CLAIM_IDLE_MS=50)
+    def test_bad_entry_is_isolated_and_dead_lettered(self):
+        self.buffer.append(make_entry(201))
+        self.buffer.append(make_entry(202, user_id=None))
+
+        self.flusher.run_once()
+        self.assertEqual(list(Notification.objects.values_list("id", flat=True)), [201])
+        self.assertEqual(self.pending(), 1)
+
+        time.sleep(0.06)
+        self.flusher.run_once()
+        self.assertEqual(self.pending(), 0)
+        (dead,) = self.buffer.client.xrange("notifications:ingest:dead")
+        self.assertEqual(json.loads(dead[1][b"data"])["id"], 202)
+
+    @override_settings(INGEST_MAX_DELIVERIES=2)
+    def test_database_outage_never_dead_letters(self):
+        self.buffer.append(make_entry(211))
+
+        with mock.patch.object(
+            IngestFlusher, "_write", side_effect=OperationalError("db down")
+        ):
+            for _ in range(4):
+                with self.assertRaises(OperationalError):
+                    self.flusher.run_once()
+
+        self.assertEqual(self.pending(), 1)
+        self.assertEqual(self.buffer.client.xlen("notifications:ingest:dead"), 0)
+
+        # БД вернулась — запись доходит до Postgres
+        self.flusher.run_once()
+        self.assertTrue(Notification.objects.filter(id=211).exists())
+        self.assertEqual(self.pending(), 0)
+
+    def test_redrive_dead_stream(self):
+        self.buffer.dead_letter("1-0", make_entry(221), "db constraint")
+
+        self.assertEqual(self.buffer.redrive(), 1)
+        self.flusher.run_once()
+
+        self.assertTrue(Notification.objects.filter(id=221).exists())
+        self.assertEqual(self.buffer.client.xlen("notifications:ingest:dead"), 0)
+
+    def test_entry_in_older_shape(self):
+        self.buffer.append(
+            {
+                "id": 301,
+                "user_id": 1,
+                "title": "title",
+                "message": "m",
+                "methods": ["SMS"],
+            }
+        )
+
+        self.flusher.run_once()
+
+        notification = Notification.objects.get(id=301)
+        self.assertEqual(notification.channels, ["SMS", "TELEGRAM", "EMAIL"])
+        self.assertEqual(notification.outbox_messages.get().recipient, "+79001234567")
+
+    def test_quiet_hours_applied_at_flush(self):
+        now = timezone.now()
+        QuietHours.objects.create(
+            user_id=1,
+            start=(now - timedelta(hours=1)).time(),
+            end=(now + timedelta(hours=1)).time(),
+        )
+        self.buffer.append(make_entry(401))
+        self.buffer.append(make_entry(402, user_id=2))
+
+        self.flusher.run_once()
+
+        scheduled = OutboxMessage.objects.get(notification_id=401)
+        self.assertEqual(scheduled.status, OutboxStatus.SCHEDULED)
+        self.assertGreater(scheduled.release_at, now + timedelta(minutes=59))
+        self.assertEqual(
+            OutboxMessage.objects.get(notification_id=402).status,
+            OutboxStatus.PENDING,
+        )
+
+    def test_allocator_does_not_reuse_ids_after_fork(self):
+        allocator = IdAllocator(block_size=3)
+        with mock.patch.object(
+            allocator, "_fetch_block", side_effect=[[3, 2, 1], [6, 5, 4]]
+        ):
+            self.assertEqual(allocator.next(), 1)
+            # Что делает os.register_at_fork(after_in_child=...) в дочернем процессе
+            allocator._reset()
+            self.assertEqual(allocator.next(), 4)
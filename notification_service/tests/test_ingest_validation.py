@@ -0,0 +1,36 @@
+from django.test import SimpleTestCase
+
+from apps.notifications.ingest import validate_notification_payload
+
+
+def make_payload(**fields):
+    return {"user_id": 1, "title": "title", "message": "message", **fields}
+
+
+class IngestValidationTests(SimpleTestCase):
+    """Некорректный payload дает ошибки валидации, а не исключение"""
+
+    def test_unhashable_delivery_methods(self):
+        for methods in ([{}], [["SMS"]], ["SMS", None], "SMS"):
+            with self.subTest(methods=methods):
+                validated, errors = validate_notification_payload(
+                    make_payload(delivery_methods=methods)
+                )
+                self.assertIsNone(validated)
+                self.assertIn("delivery_methods", errors)
+
+    def test_valid_delivery_methods(self):
+        validated, errors = validate_notification_payload(
+            make_payload(delivery_methods=["SMS", "EMAIL"])
+        )
+        self.assertIsNone(errors)
+        self.assertEqual(validated["methods"], ["SMS", "EMAIL"])
+
+    def test_invalid_send_at(self):
+        for send_at in ("2026-02-30T00:00:00Z", "2026-01-01T00:00:00", "tomorrow", 1):
+            with self.subTest(send_at=send_at):
+                validated, errors = validate_notification_payload(
+                    make_payload(send_at=send_at)
+                )
+                self.assertIsNone(validated)
+                self.assertIn("send_at", errors)
@@ -0,0 +1,87 @@
+import io
+import logging
+import logging.config
+from unittest import mock
+
+from celery.signals import worker_process_shutdown
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from apps.notifications.logging_utils import QueueListenerHandler, SamplingFilter
+
+
+class QueueListenerHandlerTests(SimpleTestCase):
+    """Записи пишутся ровно один раз и не теряются при остановке процесса"""
+
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.handler = QueueListenerHandler(stream=self.stream)
+        self.addCleanup(self.handler.close)
+
+    def emit(self, message):
+        self.handler.handle(logging.makeLogRecord({"msg": message}))
+
+    def test_child_does_not_rewrite_parent_records(self):
+        self.handler._stop_listener()
+        self.emit("parent")
+
+        # Что делает os.register_at_fork(after_in_child=...) в дочернем процессе
+        self.handler._reset()
+        self.emit("child")
+        self.handler._stop_listener()
+
+        self.assertNotIn("parent", self.stream.getvalue())
+        self.assertEqual(self.stream.getvalue().count("child"), 1)
+
+    def test_worker_process_shutdown_flushes_queue(self):
+        self.emit("last words")
+
+        worker_process_shutdown.send(sender=None, pid=0, exitcode=0)
+
+        self.assertIn("last words", self.stream.getvalue())
+
+
+class SuccessSamplingTests(SimpleTestCase):
+    """Сэмплирование успешных доставок — одно решение на запись для всех выводов"""
+
+    def setUp(self):
+        self.console, self.file = io.StringIO(), io.StringIO()
+        config = {
+            **settings.LOGGING,
+            "handlers": {
+                name: {"class": "logging.StreamHandler", "stream": stream}
+                for name, stream in (("console", self.console), ("file", self.file))
+            },
+        }
+        config["loggers"] = {
+            **config["loggers"],
+            "apps.notifications": {
+                **config["loggers"]["apps.notifications"],
+                "handlers": ["console", "file"],
+                "level": "INFO",
+            },
+        }
+        self.configure(config)
+        self.addCleanup(self.configure, settings.LOGGING)
+        (self.filter,) = logging.getLogger("apps.notifications.tasks").filters
+        self.assertIsInstance(self.filter, SamplingFilter)
+
+    def configure(self, config):
+        # dictConfig добавляет фильтры к уже настроенным логгерам, а не заменяет их
+        for name in config["loggers"]:
+            logging.getLogger(name).filters = []
+        logging.config.dictConfig(config)
+
+    @mock.patch("apps.notifications.logging_utils.random.random")
+    def test_console_and_file_keep_the_same_records(self, random):
+        self.filter.rate = 0.5
+        random.side_effect = [0.9, 0.1, 0.2, 0.8]
+
+        logger = logging.getLogger("apps.notifications.tasks")
+        for index in range(4):
+            logger.info(f"sent {index}", extra={"event": "delivery_sent"})
+        logger.info("retry", extra={"event": "delivery_retry"})
+
+        self.assertEqual(random.call_count, 4)
+        self.assertEqual(self.console.getvalue(), "sent 1\nsent 2\nretry\n")
+        self.assertEqual(self.file.getvalue(), self.console.getvalue())
@@ -0,0 +1,57 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase, override_settings
+
+
+@override_settings(CHAT_ID="")
+class BackfillRecipientsMigrationTests(TransactionTestCase):
+    """0003_recipients дописывает адреса в неотправленные сообщения"""
+
+    migrate_from = [("notifications", "0002_outbox_sharding")]
+    migrate_to = [("notifications", "0003_recipients")]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_backfill(self):
+        apps = self.migrate(self.migrate_from)
+        Notification = apps.get_model("notifications", "Notification")
+        OutboxMessage = apps.get_model("notifications", "OutboxMessage")
+
+        notification = Notification.objects.create(user_id=1, title="t", message="m")
+        sms_payload = {"phone": "8 (900) 123-45-67", "message": "t: m"}
+        sms = OutboxMessage.objects.create(
+            notification=notification,
+            method="SMS",
+            status="ENQUEUED",
+            payload=sms_payload,
+        )
+        # Fallback прошлых версий: копия SMS-payload без chat_id
+        telegram = OutboxMessage.objects.create(
+            notification=notification,
+            method="TELEGRAM",
+            status="PENDING",
+            payload=sms_payload,
+        )
+
+        apps = self.migrate(self.migrate_to)
+        Notification = apps.get_model("notifications", "Notification")
+        OutboxMessage = apps.get_model("notifications", "OutboxMessage")
+
+        telegram = OutboxMessage.objects.get(id=telegram.id)
+        self.assertEqual(telegram.recipient, "123456789")
+        self.assertEqual(telegram.payload["chat_id"], "123456789")
+        sms = OutboxMessage.objects.get(id=sms.id)
+        self.assertEqual(sms.recipient, "+79001234567")
+        self.assertEqual(sms.payload["phone"], "+79001234567")
+        self.assertEqual(
+            Notification.objects.get(id=notification.id).recipients,
+            {"SMS": "+79001234567", "TELEGRAM": "123456789", "EMAIL": "test1@mail.ru"},
+        )
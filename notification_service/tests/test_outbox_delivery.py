@@ -0,0 +1,64 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from apps.notifications.gateways import DeliveryResult, DeliveryService
+from apps.notifications.models import DeadLetter, OutboxMessage, OutboxStatus
+from apps.notifications.services import NotificationService
+from apps.notifications.tasks import process_single_outbox_message
+
+
+@mock.patch("apps.notifications.tasks.recorder")
+@mock.patch.object(
+    DeliveryService,
+    "send_via_method",
+    return_value=DeliveryResult(False, error="Timeout"),
+)
+class ProcessSingleOutboxMessageTests(TestCase):
+    """Неудачная попытка: повтор, затем fallback, затем dead letter"""
+
+    def create_message(self, methods, attempts_left=None):
+        notification = NotificationService().create_notification(
+            user_id=1, title="title", message="message", methods=methods
+        )
+        message = notification.outbox_messages.get()
+        message.status = OutboxStatus.ENQUEUED
+        if attempts_left is not None:
+            message.attempt_count = message.max_retries - attempts_left
+        message.save()
+        return message
+
+    def test_failure_with_retries_left_is_scheduled(self, send_via_method, recorder):
+        message = self.create_message(["SMS"])
+
+        result = process_single_outbox_message(message.id)
+
+        self.assertEqual(result["status"], "retry")
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxStatus.SCHEDULED)
+        self.assertEqual(message.last_error, "Timeout")
+        self.assertIsNotNone(message.release_at)
+
+    def test_last_attempt_falls_back_to_next_channel(self, send_via_method, recorder):
+        message = self.create_message(["SMS"], attempts_left=1)
+
+        result = process_single_outbox_message(message.id)
+
+        self.assertEqual(result["status"], "failed")
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxStatus.FAILED)
+        fallback = OutboxMessage.objects.exclude(id=message.id).get()
+        self.assertEqual(fallback.method, "TELEGRAM")
+        self.assertFalse(DeadLetter.objects.exists())
+
+    def test_last_channel_is_dead_lettered(self, send_via_method, recorder):
+        message = self.create_message(["EMAIL"], attempts_left=1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            process_single_outbox_message(message.id)
+
+        dead_letter = DeadLetter.objects.get()
+        self.assertEqual(dead_letter.outbox_message_id, message.id)
+        self.assertEqual(dead_letter.reason, "Timeout")
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+        recorder.record_transition.assert_any_call("EMAIL", "dead_lettered")
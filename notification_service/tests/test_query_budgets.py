@@ -0,0 +1,102 @@
+from unittest import mock
+
+from django.db import connections
+from django.test import TestCase, override_settings
+
+from apps.notifications.gateways import DeliveryResult, DeliveryService
+from apps.notifications.models import (
+    ChannelPreference,
+    Notification,
+    OutboxMessage,
+    OutboxStatus,
+)
+from apps.notifications.profiling import PERF_BUDGETS, QueryProfiler
+from apps.notifications.routing import routing_table
+from apps.notifications.services import NotificationService
+from apps.notifications.tasks import (
+    process_pending_outbox_messages,
+    process_single_outbox_message,
+)
+
+
+# Версия таблицы маршрутизации живет в кэше Django: тестам не нужен живой Redis
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class QueryBudgetTests(TestCase):
+    """Горячие пути не должны превышать бюджет SQL-запросов"""
+
+    def assertWithinBudget(self, name, profiler):
+        self.assertLessEqual(
+            profiler.sql_count,
+            PERF_BUDGETS[name],
+            f"{name}: {profiler.sql_count} запросов\n" + "\n".join(profiler.queries),
+        )
+
+    def create_outbox_messages(self, count, status=OutboxStatus.PENDING):
+        service = NotificationService()
+        for _ in range(count):
+            service.create_notification(user_id=1, title="title", message="message")
+        OutboxMessage.objects.update(status=status)
+        return list(OutboxMessage.objects.values_list("id", flat=True))
+
+    def test_create_notification(self):
+        with QueryProfiler() as profiler:
+            NotificationService().create_notification(
+                user_id=1, title="title", message="message", methods=["SMS"]
+            )
+
+        self.assertWithinBudget("create_notification", profiler)
+
+    def test_create_notification_with_channel_preferences(self):
+        # Инвалидация таблицы маршрутизации срабатывает после коммита
+        with self.captureOnCommitCallbacks(execute=True):
+            ChannelPreference.objects.create(
+                user_id=1, notification_type="promo", channels=["TELEGRAM", "EMAIL"]
+            )
+        # Предпочтения загружаются один раз на получателя, не на уведомление
+        routing_table().channels_for(1)
+        # Кэш процесса переживает откат транзакции теста
+        self.addCleanup(routing_table().invalidate, 1)
+
+        with QueryProfiler() as profiler:
+            notification = NotificationService().create_notification(
+                user_id=1, title="title", message="message", notification_type="promo"
+            )
+
+        self.assertWithinBudget("create_notification", profiler)
+        self.assertEqual(notification.channels, ["TELEGRAM", "EMAIL"])
+
+    @mock.patch.object(process_single_outbox_message, "delay")
+    def test_process_pending_outbox_messages(self, delay):
+        self.create_outbox_messages(20)
+
+        with QueryProfiler() as profiler:
+            process_pending_outbox_messages()
+
+        self.assertWithinBudget("process_pending_outbox_messages", profiler)
+        self.assertEqual(delay.call_count, 20)
+
+    # Попытка пишется пачкой из фонового потока и в бюджет горячего пути не входит
+    @mock.patch("apps.notifications.tasks.recorder")
+    @mock.patch.object(
+        DeliveryService, "send_via_method", return_value=DeliveryResult(True)
+    )
+    def test_process_single_outbox_message(self, send_via_method, recorder):
+        (message_id,) = self.create_outbox_messages(1, status=OutboxStatus.ENQUEUED)
+
+        with QueryProfiler() as profiler:
+            result = process_single_outbox_message(message_id)
+
+        self.assertWithinBudget("process_single_outbox_message", profiler)
+        self.assertEqual(result["status"], "sent")
+        self.assertEqual(recorder.record.call_count, 1)
+
+    def test_profiler_counts_every_database(self):
+        with QueryProfiler() as profiler:
+            for alias in connections:
+                Notification.objects.using(alias).exists()
+
+        self.assertEqual(set(profiler.sql_by_alias), set(connections))
+        self.assertTrue(all(profiler.sql_by_alias.values()))
+        self.assertEqual(profiler.sql_count, sum(profiler.sql_by_alias.values()))
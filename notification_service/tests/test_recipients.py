@@ -0,0 +1,81 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.notifications.models import Notification
+from apps.notifications.recipients import (
+    normalize_chat_id,
+    normalize_email,
+    normalize_phone,
+)
+
+
+class NormalizerTests(TestCase):
+    """Нормализация адресов получателей"""
+
+    def test_phone(self):
+        cases = {
+            "+7 900 123-45-67": "+79001234567",
+            "89001234567": "+79001234567",
+            "8 495 123 45 67": "+74951234567",
+            "8 (812) 123-45-67": "+78121234567",
+            "7 495 123 45 67": "+74951234567",
+            "+44 20 7946 0958": "+442079460958",
+            "1234567": None,
+            "495 123 45 67": None,
+            "not a phone": None,
+        }
+        for value, expected in cases.items():
+            with self.subTest(value=value):
+                self.assertEqual(normalize_phone(value), expected)
+
+    def test_email(self):
+        self.assertEqual(normalize_email(" User@Mail.RU "), "User@mail.ru")
+        self.assertIsNone(normalize_email("user@mail"))
+        self.assertIsNone(normalize_email("user mail.ru"))
+
+    def test_chat_id(self):
+        self.assertEqual(normalize_chat_id(" 123456789 "), "123456789")
+        self.assertEqual(normalize_chat_id("-100123"), "-100123")
+        self.assertEqual(normalize_chat_id("@channel_name"), "@channel_name")
+        self.assertIsNone(normalize_chat_id("@abc"))
+        self.assertIsNone(normalize_chat_id("12ab"))
+
+
+@override_settings(CHAT_ID="", NOTIFICATION_INGEST_MODE="direct")
+class RecipientsApiTests(TestCase):
+    """Проверка адресов через API"""
+
+    def test_validate_recipients(self):
+        response = APIClient().post(
+            "/api/notifications/validate-recipients/",
+            {"method": "SMS", "recipients": ["8 495 123 45 67", "12345", ""]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body["valid"], body["invalid"]), (1, 2))
+        self.assertEqual(
+            [result["normalized"] for result in body["results"]],
+            ["+74951234567", None, None],
+        )
+
+    def test_validate_recipients_unknown_method(self):
+        response = APIClient().post(
+            "/api/notifications/validate-recipients/",
+            {"method": "PIGEON", "recipients": ["x"]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_create_without_any_address_is_rejected(self):
+        response = APIClient().post(
+            "/api/notifications/",
+            {"user_id": 999, "title": "title", "message": "message"},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("delivery_methods", response.json())
+        self.assertFalse(Notification.objects.exists())
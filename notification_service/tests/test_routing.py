@@ -0,0 +1,60 @@
+from django.test import TestCase, override_settings
+
+from apps.notifications.models import ChannelPreference
+from apps.notifications.routing import routing_table
+from apps.notifications.services import NotificationService
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    ROUTING_TABLE_CHECK_SECONDS=60,
+)
+class RoutingTableTests(TestCase):
+    """Кэш предпочтений каналов по получателю"""
+
+    def setUp(self):
+        # Кэш процесса переживает откат транзакции теста
+        for user_id in (1, 2, 3):
+            routing_table().invalidate(user_id)
+            self.addCleanup(routing_table().invalidate, user_id)
+
+    def save_preference(self, user_id, channels):
+        with self.captureOnCommitCallbacks(execute=True):
+            ChannelPreference.objects.update_or_create(
+                user_id=user_id, notification_type="", defaults={"channels": channels}
+            )
+
+    def test_saved_preference_is_used_after_commit(self):
+        self.save_preference(1, ["EMAIL"])
+        self.assertEqual(routing_table().channels_for(1), ["EMAIL"])
+
+        self.save_preference(1, ["TELEGRAM", "SMS"])
+
+        notification = NotificationService().create_notification(
+            user_id=1, title="title", message="message"
+        )
+        self.assertEqual(notification.channels, ["TELEGRAM", "SMS"])
+
+    def test_change_reloads_only_that_user(self):
+        self.save_preference(1, ["EMAIL"])
+        self.save_preference(2, ["SMS"])
+        routing_table().channels_for(1)
+        routing_table().channels_for(2)
+
+        self.save_preference(1, ["TELEGRAM"])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(routing_table().channels_for(2), ["SMS"])
+        with self.assertNumQueries(1):
+            self.assertEqual(routing_table().channels_for(1), ["TELEGRAM"])
+
+    def test_notification_type_falls_back_to_common_chain(self):
+        self.save_preference(1, ["EMAIL"])
+        with self.captureOnCommitCallbacks(execute=True):
+            ChannelPreference.objects.create(
+                user_id=1, notification_type="promo", channels=["TELEGRAM"]
+            )
+
+        self.assertEqual(routing_table().channels_for(1, "promo"), ["TELEGRAM"])
+        self.assertEqual(routing_table().channels_for(1, "billing"), ["EMAIL"])
+        self.assertIsNone(routing_table().channels_for(3))
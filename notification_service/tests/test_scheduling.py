@@ -0,0 +1,144 @@
+from datetime import datetime, time, timedelta, timezone
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.notifications.models import (
+    Notification,
+    OutboxStatus,
+    QuietHours,
+)
+from apps.notifications.scheduling import DeliveryScheduler
+from apps.notifications.services import NotificationService
+from apps.notifications.tasks import release_scheduled_outbox_messages
+
+# 12:00 UTC — 15:00 в Москве
+NOON = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def utc(hour, minute=0, day=1):
+    return datetime(2026, 1, day, hour, minute, tzinfo=timezone.utc)
+
+
+class QuietHoursTests(TestCase):
+    """Окно тишины в часовом поясе получателя, в том числе через полночь"""
+
+    def test_same_day_window(self):
+        quiet_hours = QuietHours(
+            user_id=1, start=time(13), end=time(17), timezone="Europe/Moscow"
+        )
+
+        self.assertTrue(quiet_hours.contains(NOON))
+        self.assertFalse(quiet_hours.contains(utc(14)))
+        self.assertEqual(quiet_hours.window_end(NOON), utc(14))
+
+    def test_window_across_midnight(self):
+        quiet_hours = QuietHours(user_id=1, start=time(22), end=time(8))
+
+        self.assertTrue(quiet_hours.contains(utc(23)))
+        self.assertTrue(quiet_hours.contains(utc(3, day=2)))
+        self.assertFalse(quiet_hours.contains(utc(8)))
+        self.assertFalse(quiet_hours.contains(NOON))
+        # До полуночи конец окна — завтра, после полуночи — сегодня
+        self.assertEqual(quiet_hours.window_end(utc(23)), utc(8, day=2))
+        self.assertEqual(quiet_hours.window_end(utc(3, day=2)), utc(8, day=2))
+
+
+@override_settings(SCHEDULE_JITTER_SECONDS=60, QUIET_HOURS_SPREAD_SECONDS=1800)
+class DeliverySchedulerTests(TestCase):
+    """Момент выпуска: send_at и конец окна тишины плюс ограниченный сдвиг"""
+
+    def setUp(self):
+        self.scheduler = DeliveryScheduler()
+        QuietHours.objects.create(user_id=2, start=time(22), end=time(8))
+
+    def test_immediate_delivery(self):
+        self.assertIsNone(self.scheduler.release_at(1, now=NOON))
+        self.assertIsNone(self.scheduler.release_at(1, send_at=utc(11), now=NOON))
+
+    def test_send_at_jitter_bounds(self):
+        send_at = NOON + timedelta(hours=1)
+        for uniform in (0.0, 60.0):
+            with mock.patch("random.uniform", return_value=uniform) as jitter:
+                release_at = self.scheduler.release_at(1, send_at=send_at, now=NOON)
+            jitter.assert_called_once_with(0, 60)
+            self.assertEqual(release_at, send_at + timedelta(seconds=uniform))
+
+    def test_quiet_hours_spread_bounds(self):
+        for _ in range(20):
+            release_at = self.scheduler.release_at(2, now=utc(23))
+            self.assertGreaterEqual(release_at, utc(8, day=2))
+            self.assertLessEqual(release_at, utc(8, 30, day=2))
+
+
+class ReleaseScheduledOutboxMessagesTests(TestCase):
+    """SCHEDULED уходят в PENDING по release_at, но не во время окна тишины"""
+
+    def create_message(self, user_id, release_at):
+        notification = NotificationService().create_notification(
+            user_id=user_id, title="title", message="message", methods=["SMS"]
+        )
+        message = notification.outbox_messages.get()
+        message.status = OutboxStatus.SCHEDULED
+        message.release_at = release_at
+        message.save()
+        return message
+
+    def test_release(self):
+        now = datetime.now(timezone.utc)
+        due = self.create_message(1, now - timedelta(seconds=1))
+        future = self.create_message(1, now + timedelta(hours=1))
+
+        self.assertEqual(release_scheduled_outbox_messages()["released"], 1)
+
+        due.refresh_from_db()
+        self.assertEqual(due.status, OutboxStatus.PENDING)
+        future.refresh_from_db()
+        self.assertEqual(future.status, OutboxStatus.SCHEDULED)
+
+    def test_retry_inside_quiet_hours_is_deferred(self):
+        now = datetime.now(timezone.utc)
+        QuietHours.objects.create(
+            user_id=2,
+            start=(now - timedelta(hours=1)).time(),
+            end=(now + timedelta(hours=1)).time(),
+        )
+        message = self.create_message(2, now - timedelta(seconds=1))
+
+        result = release_scheduled_outbox_messages()
+
+        self.assertEqual(result, {"released": 0, "deferred": 1})
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxStatus.SCHEDULED)
+        self.assertGreater(message.release_at, now + timedelta(minutes=59))
+
+    def test_fallback_inside_quiet_hours_is_scheduled(self):
+        now = datetime.now(timezone.utc)
+        message = self.create_message(1, None)
+        QuietHours.objects.create(
+            user_id=1,
+            start=(now - timedelta(hours=1)).time(),
+            end=(now + timedelta(hours=1)).time(),
+        )
+
+        fallback = message.create_fallback()
+
+        self.assertEqual(fallback.status, OutboxStatus.SCHEDULED)
+        self.assertGreater(fallback.release_at, now + timedelta(minutes=59))
+
+
+class NotificationUpdateTests(TestCase):
+    def test_send_at_is_read_only_after_creation(self):
+        notification = Notification.objects.create(user_id=1, title="t", message="m")
+
+        response = APIClient().patch(
+            f"/api/notifications/{notification.id}/",
+            {"send_at": "2030-01-01T00:00:00Z", "title": "new"},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        notification.refresh_from_db()
+        self.assertEqual(notification.title, "new")
+        self.assertIsNone(notification.send_at)
@@ -0,0 +1,97 @@
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.notifications.models import OutboxClaimer, OutboxMessage, OutboxShardLease
+from apps.notifications.services import NotificationService
+from apps.notifications.sharding import ShardLeaseManager, reshard_outbox
+
+
+@override_settings(OUTBOX_SHARD_COUNT=16)
+class ReshardTests(TestCase):
+    """Уменьшение OUTBOX_SHARD_COUNT не оставляет сообщений без claimer-а"""
+
+    def setUp(self):
+        service = NotificationService()
+        for _ in range(20):
+            service.create_notification(
+                user_id=1, title="title", message="message", methods=["SMS"]
+            )
+        ShardLeaseManager("claimer").heartbeat()
+
+    @override_settings(OUTBOX_SHARD_COUNT=4)
+    def test_lower_shard_count_requires_reshard(self):
+        with self.assertRaises(ImproperlyConfigured):
+            ShardLeaseManager("claimer").heartbeat()
+
+        self.assertGreater(reshard_outbox(batch_size=3), 0)
+
+        self.assertEqual(ShardLeaseManager("claimer").heartbeat(), [0, 1, 2, 3])
+        self.assertFalse(OutboxMessage.objects.filter(shard__gte=4).exists())
+        self.assertEqual(OutboxShardLease.objects.count(), 4)
+        for notification_id, shard in OutboxMessage.objects.values_list(
+            "notification_id", "shard"
+        ):
+            self.assertEqual(shard, notification_id % 4)
+
+
+@override_settings(OUTBOX_SHARD_COUNT=4, OUTBOX_SHARD_LEASE_TTL=30)
+class ShardLeaseTests(TestCase):
+    """Распределение шардов между claimer-ами"""
+
+    def test_peer_join_splits_shards(self):
+        first, second = ShardLeaseManager("first"), ShardLeaseManager("second")
+        self.assertEqual(first.heartbeat(), [0, 1, 2, 3])
+
+        # Все аренды еще действуют: новичок ждет, пока первый отдаст лишнее
+        self.assertEqual(second.heartbeat(), [])
+        self.assertEqual(first.heartbeat(), [0, 1])
+        self.assertEqual(second.heartbeat(), [2, 3])
+
+    def test_dead_peer_shards_are_taken_over_after_ttl(self):
+        first, second = ShardLeaseManager("first"), ShardLeaseManager("second")
+        first.heartbeat()
+        second.heartbeat()
+        first.heartbeat()
+        self.assertEqual(second.heartbeat(), [2, 3])
+
+        # Пока аренды первого живы, второй их не трогает
+        self.assertEqual(second.heartbeat(), [2, 3])
+
+        expired = timezone.now() - timezone.timedelta(seconds=31)
+        OutboxClaimer.objects.filter(name="first").update(heartbeat_at=expired)
+        OutboxShardLease.objects.filter(owner="first").update(expires_at=expired)
+
+        self.assertEqual(second.heartbeat(), [0, 1, 2, 3])
+
+
+@override_settings(OUTBOX_SHARD_COUNT=4)
+class OutboxClaimerCommandTests(TestCase):
+    """Цикл run_outbox_claimer переживает ошибки базы"""
+
+    @mock.patch("apps.notifications.management.commands.run_outbox_claimer.time.sleep")
+    @mock.patch(
+        "apps.notifications.management.commands.run_outbox_claimer.claim_outbox_messages"
+    )
+    @mock.patch.object(ShardLeaseManager, "release")
+    @mock.patch.object(ShardLeaseManager, "heartbeat")
+    def test_errors_are_logged_and_loop_continues(
+        self, heartbeat, release, claim, sleep
+    ):
+        heartbeat.side_effect = [OperationalError("db down"), [0, 1], [0, 1]]
+        claim.side_effect = [OperationalError("db down"), [], KeyboardInterrupt]
+
+        with self.assertLogs(
+            "apps.notifications.management.commands.run_outbox_claimer", "ERROR"
+        ) as logs:
+            call_command("run_outbox_claimer", name="claimer", interval=0)
+
+        self.assertEqual(len(logs.records), 2)
+        # После ошибки heartbeat шарды не опрашиваются, пока аренда не продлена
+        self.assertEqual(claim.call_count, 3)
+        self.assertEqual([call.args[0] for call in claim.call_args_list], [[0, 1]] * 3)
+        release.assert_called_once()
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta, timezone
+
+from django.test import TestCase
+
+from apps.notifications.models import DeliveryAttempt
+from apps.notifications.stats import StatsRollup, bucket_stats
+
+START = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def attempt(moment, latency_ms):
+    return DeliveryAttempt(method="SMS", attempted_at=moment, latency_ms=latency_ms)
+
+
+class StatsRollupTests(TestCase):
+    """Пачки событий сводятся в минутные счетчики и читаются по интервалам"""
+
+    def setUp(self):
+        first = StatsRollup()
+        first.add_attempt(attempt(START + timedelta(seconds=10), 100))
+        first.add_attempt(attempt(START + timedelta(seconds=50), 300))
+        first.add_transition("SMS", "sent", START + timedelta(seconds=50))
+        first.apply()
+
+        # Вторая пачка инкрементально дописывает те же и новые минуты
+        second = StatsRollup()
+        second.add_attempt(attempt(START + timedelta(seconds=20), 200))
+        second.add_transition("SMS", "failed", START + timedelta(seconds=20))
+        second.add_transition("SMS", "fallbacks", START + timedelta(seconds=20))
+        second.add_attempt(attempt(START + timedelta(minutes=1, seconds=5), 400))
+        second.add_transition("SMS", "sent", START + timedelta(minutes=1, seconds=5))
+        second.apply()
+
+    def test_minute_buckets(self):
+        rows = bucket_stats(START, START + timedelta(hours=1))
+
+        self.assertEqual(
+            [row["bucket"] for row in rows], [START, START + timedelta(minutes=1)]
+        )
+        self.assertEqual(rows[0]["attempts"], 3)
+        self.assertEqual(rows[0]["sent"], 1)
+        self.assertEqual(rows[0]["failed"], 1)
+        self.assertEqual(rows[0]["avg_latency_ms"], 200.0)
+        self.assertEqual(rows[0]["max_latency_ms"], 300)
+        self.assertEqual(rows[0]["fallback_rate"], 0.5)
+        self.assertEqual(rows[1]["attempts"], 1)
+
+    def test_hour_interval(self):
+        (row,) = bucket_stats(START, START + timedelta(hours=1), interval="hour")
+
+        self.assertEqual(row["bucket"], START)
+        self.assertEqual(row["attempts"], 4)
+        self.assertEqual(row["sent"], 2)
+        self.assertEqual(row["avg_latency_ms"], 250.0)
+        self.assertEqual(row["max_latency_ms"], 400)
+        self.assertEqual(row["fallback_rate"], round(1 / 3, 4))
+
+    def test_method_filter(self):
+        self.assertEqual(
+            bucket_stats(START, START + timedelta(hours=1), method="EMAIL"), []
+        )